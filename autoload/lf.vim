@@ -41,10 +41,24 @@ function! s:action(runner, default_action) abort
   else
     exec g:vlf_py printf("logger.info('<%s_action: %s>')", name, action)
   endif
-  exec g:vlf_py printf("vlf_manager.%s%s()", member, action)
+  call s:run(name.':'.action, printf("vlf_manager.%s%s()", member, action))
   return action
 endfunction
 
+" run python code, timed as action name by the profiler if it is on
+function! s:run(name, code) abort
+  if !g:vlf_profile
+    exec g:vlf_py a:code
+    return
+  endif
+  exec g:vlf_py printf("vlf_profiler.begin('%s')", a:name)
+  try
+    exec g:vlf_py a:code
+  finally
+    exec g:vlf_py "vlf_profiler.end()"
+  endtry
+endfunction
+
 function! lf#action() abort
   return s:action('', 'skip')
 endfunction
@@ -61,6 +75,63 @@ function! lf#msg() abort
   return s:action('msg_panel', 'skip')
 endfunction
 
+function! lf#preview(tick, timer) abort
+  call s:run('timer:preview', printf("vlf_manager.preview(%d)", a:tick))
+endfunction
+
+function! lf#scan_poll(timer) abort
+  call s:run('timer:scan_poll', "vlf_manager.scan_poll()")
+endfunction
+
+function! lf#grep_poll(timer) abort
+  call s:run('timer:grep_poll', "vlf_manager.grep_poll()")
+endfunction
+
+function! lf#job_poll(timer) abort
+  call s:run('timer:job_poll', "vlf_manager.job_poll()")
+endfunction
+
+function! lf#watch_poll(timer) abort
+  call s:run('timer:watch_poll', "vlf_manager.watch_poll()")
+endfunction
+
+" replace the matches ids in popup winid by one match per item of matches,
+" [group, row, priority] adds a match of line row and [group, pattern,
+" priority] a match of pattern, then scroll line row to the middle if it is
+" positive, return the new match ids
+function! lf#highlight(winid, ids, matches, row) abort
+  for id in a:ids
+    silent! call matchdelete(id, a:winid)
+  endfor
+  let ids = []
+  for m in a:matches
+    if type(m[1]) == v:t_number
+      call add(ids, matchaddpos(m[0], [m[1]], m[2], -1, #{window: a:winid}))
+    else
+      call add(ids, matchadd(m[0], m[1], m[2], -1, #{window: a:winid}))
+    endif
+  endfor
+  if a:row > 0
+    call win_execute(a:winid, printf('norm! %dzz', a:row), 1)
+  endif
+  return ids
+endfunction
+
+" matchaddpos() before vim 9.0.0620 takes at most 8 positions
+function! lf#matchaddpos(winid, group, pos, priority) abort
+  for i in range(0, len(a:pos) - 1, 8)
+    call matchaddpos(a:group, a:pos[i : i + 7], a:priority, -1, #{window: a:winid})
+  endfor
+endfunction
+
+function! lf#profile(arg) abort
+  exec g:vlf_py printf("vlf_manager.profile('%s')", a:arg)
+endfunction
+
+function! lf#profile_complete(...) abort
+  return "on\noff\nreset\nexport"
+endfunction
+
 function! lf#check_log() abort
   exec g:vlf_py "vlf_manager.check_log()"
 endfunction
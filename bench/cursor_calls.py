@@ -0,0 +1,50 @@
+"""
+count the vim calls made by one cursor step in the middle panel
+
+    python bench/cursor_calls.py [directory]
+
+a directory of 500 files is created if none is given
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / 'python'))
+sys.path.insert(0, str(HERE))
+
+import vim
+
+STEPS = 100
+
+
+def main():
+    tmp = tempfile.TemporaryDirectory()
+    vim.vars['vlf_cache_path'] = tmp.name + '/cache'
+    if len(sys.argv) > 1:
+        cwd = sys.argv[1]
+    else:
+        cwd = Path(tmp.name) / 'files'
+        cwd.mkdir()
+        for i in range(500):
+            (cwd / "file{:03d}".format(i)).touch()
+    from lf.manager import vlf_manager
+    vlf_manager._action = lambda: None
+    vlf_manager.start(str(cwd))
+    steps = [
+        ('DirPanel.move', lambda: vlf_manager.middle_panel.move(down=True)),
+        ('Manager.down', vlf_manager.down),
+    ]
+    for name, step in steps:
+        vim.calls.clear()
+        for _ in range(STEPS):
+            step()
+        total = vim.calls['eval'] + vim.calls['command']
+        detail = ', '.join("{} {:g}".format(k, v / STEPS) for k, v in sorted(vim.calls.items())
+                           if k not in ('eval', 'command'))
+        print("{:<14} {:5.2f} vim calls per step ({})".format(name, total / STEPS, detail))
+    vlf_manager._close()
+
+
+if __name__ == '__main__':
+    main()
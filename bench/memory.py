@@ -0,0 +1,69 @@
+"""
+memory of the listing model per entry
+
+    python bench/memory.py [--sizes 1000,100000] [--root DIR]
+
+the entries and lines of a synthetic directory made by run.py are measured
+with tracemalloc
+"""
+import argparse
+import gc
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / 'python'))
+sys.path.insert(0, str(HERE))
+
+import vim
+from run import make_tree
+
+
+class Panel(object):
+    """
+    the attributes of DirPanel that the model reads
+    """
+    def __init__(self, cwd):
+        self.cwd = cwd
+        self.winwidth = 80
+        self.show_hidden = False
+        self.entry_list = []
+
+
+def measure(build):
+    """
+    result of build and the bytes it keeps allocated
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,100000')
+    parser.add_argument('--root', help='directory of the synthetic trees')
+    args = parser.parse_args()
+    tmp = tempfile.TemporaryDirectory()
+    root = Path(args.root) if args.root else Path(tmp.name)
+    vim.vars['vlf_cache_path'] = tmp.name + '/cache'
+    from lf.scan import scandir
+    from lf.text import Text
+    print("{:>8} {:>14} {:>14}".format('entries', 'entry B/entry', 'line B/entry'))
+    for size in [int(s) for s in args.sizes.split(',')]:
+        panel = Panel(make_tree(root, size))
+        panel.entry_list, entry_bytes = measure(lambda: scandir(panel.cwd))
+        text, line_bytes = measure(lambda: Text(panel))
+        n = len(panel.entry_list)
+        print("{:>8} {:>14.0f} {:>14.0f}".format(n, entry_bytes / n, line_bytes / n))
+
+
+if __name__ == '__main__':
+    main()
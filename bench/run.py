@@ -0,0 +1,149 @@
+"""
+benchmark the hot paths outside vim on synthetic directories
+
+    python bench/run.py [--sizes 1000,10000,100000] [--repeat 3] [--root DIR]
+
+each operation runs on a directory of the given number of entries, one in
+ten of them a directory, and reports the best wall time of the repeats and
+the vim calls of one run. the directories are created under --root, which
+is kept between runs if given
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / 'python'))
+sys.path.insert(0, str(HERE))
+
+import vim
+
+
+def make_tree(root, size):
+    """
+    directory of size entries, created once
+    """
+    path = root / "n{}".format(size)
+    done = path / '.done'
+    if done.exists():
+        return path
+    path.mkdir(parents=True, exist_ok=True)
+    for i in range(size):
+        name = "entry_{:06d}_{}".format(i, ('alpha', 'beta', 'gamma', 'delta')[i % 4])
+        if i % 10 == 0:
+            (path / name).mkdir(exist_ok=True)
+        else:
+            (path / (name + ('.py', '.txt', '.md')[i % 3])).touch()
+    done.touch()
+    return path
+
+
+def measure(fun, setup, repeat):
+    """
+    best wall time in ms and the vim calls of the last run, setup is run
+    untimed before each run
+    """
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        vim.calls.clear()
+        start = time.perf_counter()
+        fun()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, vim.calls['eval'] + vim.calls['command']
+
+
+def operations(manager):
+    """
+    (name, setup, operation), setup is None or prepares the state that
+    operation starts from
+    """
+    from lf.panel import RegexSearchPanel, FuzzySearchPanel
+    from lf.text import Text
+    from lf.cache import listing_cache
+    from lf.option import lfopt
+    middle = manager.middle_panel
+
+    def search(cls, pattern, backend='python'):
+        def run():
+            lfopt.search_backend = backend
+            panel = cls(manager)
+            panel.cmd = pattern
+            panel._refresh()
+            manager.search_panel = panel
+            manager.mode = 'filter'
+            lfopt.search_backend = 'python'
+        return run
+
+    def select_all():
+        manager.select()
+        manager.select_all()
+
+    def index_last():
+        middle._index(middle.text[-1].path)
+
+    def index_cold():
+        middle.refresh()
+        middle.text = list(middle.text)
+
+    def on_ext():
+        manager.normal()
+        middle._index(next(line.path for line in middle.text if line.path.suffix == '.py'))
+
+    def filtered():
+        on_ext()
+        manager.filter_ext()
+
+    def select_move():
+        for _ in range(10):
+            manager.up()
+
+    return [
+        ('Text', None, lambda: Text(middle)),
+        ('DirPanel.refresh', lambda: listing_cache.invalidate(middle.cwd), middle.refresh),
+        ('DirPanel.refresh (cached)', None, middle.refresh),
+        ('DirPanel._index', index_cold, index_last),
+        ('DirPanel._index (warm)', None, index_last),
+        ('RegexSearch.filter', manager.normal, search(RegexSearchPanel, r'gamma.*\.py')),
+        ('RegexSearch.filter (vim)', manager.normal, search(RegexSearchPanel, r'gamma.*\.py', 'vim')),
+        ('FuzzySearch.filter', manager.normal, search(FuzzySearchPanel, 'gmpy')),
+        ('Manager.filter_ext', on_ext, manager.filter_ext),
+        ('Manager.normal (filter_ext)', filtered, manager.normal),
+        ('Select.select_all', manager.normal, select_all),
+        ('Select._update x10', select_all, select_move),
+        ('InfoPanel.info_path', manager.normal, manager.info_panel.info_path),
+        ('Manager.down', manager.normal, manager.down),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--root', help='directory of the synthetic trees')
+    args = parser.parse_args()
+    tmp = tempfile.TemporaryDirectory()
+    root = Path(args.root) if args.root else Path(tmp.name)
+    vim.vars['vlf_cache_path'] = tmp.name + '/cache'
+    vim.vars['vlf_preview_delay'] = 0
+    vim.vars['vlf_watch'] = 0
+    from lf.manager import vlf_manager
+    vlf_manager._action = lambda: None
+    print("{:<28} {:>8} {:>10} {:>10}".format('operation', 'entries', 'ms', 'vim calls'))
+    for size in [int(s) for s in args.sizes.split(',')]:
+        cwd = make_tree(root, size)
+        vlf_manager.start(str(cwd))
+        for name, setup, fun in operations(vlf_manager):
+            ms, calls = measure(fun, setup, args.repeat)
+            print("{:<28} {:>8} {:>10.2f} {:>10}".format(name, size, ms, calls))
+        vlf_manager.normal()
+        vlf_manager._close()
+        vlf_manager._is_start = False
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+stand-in of the vim module of the python interface for benchmarks outside
+vim, every call is counted and the functions the plugin relies on return
+plausible values
+"""
+import ast
+import os
+import re
+from collections import Counter
+from types import SimpleNamespace
+from unicodedata import east_asian_width
+
+
+class error(Exception):
+    pass
+
+
+calls = Counter()  # 'eval', 'command' and the name of each called function
+cmds = []
+vars = {}
+options = {'&laststatus': '2', '&t_ve': '', '&ambiwidth': 'single', '&tabstop': '8', '&emoji': '1',
+           '&lines': '50', '&columns': '200', '&ignorecase': '0', '&smartcase': '0'}
+_id = [1000]
+current = SimpleNamespace(buffer=[])
+
+
+def _new_id():
+    _id[0] += 1
+    return str(_id[0])
+
+
+def _vimval(v):
+    # vim.eval returns numbers as strings
+    if isinstance(v, list):
+        return [_vimval(x) for x in v]
+    if isinstance(v, dict):
+        return {k: _vimval(x) for k, x in v.items()}
+    return str(v)
+
+
+def _get(args):
+    m = re.match(r"g:, '([^']*)', (.*)$", args, re.S)
+    name, default = m.group(1), m.group(2)
+    if name in vars:
+        return _vimval(vars[name])
+    return _vimval(ast.literal_eval(default))
+
+
+def _matchstrpos(args):
+    m = re.match(r"'(.*)', '(.*)'$", args, re.S)
+    s, p = m.group(1), m.group(2)
+    p = p.replace('\\<', r'\b').replace('\\>', r'\b')
+    r = re.search(p, s)
+    if r is None:
+        return ['', '-1', '-1']
+    return [r.group(0), str(r.start()), str(r.end())]
+
+
+def _string(args):
+    return ast.literal_eval(args.replace("''", "\\'")) if args[:1] == "'" else args
+
+
+def _strdisplaywidth(args):
+    return str(sum(2 if east_asian_width(ch) in 'WF' else 1 for ch in _string(args)))
+
+
+def _highlight(args):
+    # lf#highlight returns one id per match
+    return [_new_id() for _ in range(args.count("['vlf_"))]
+
+
+FUNCS = {
+    'get': _get,
+    'popup_create': lambda a: _new_id(),
+    'winbufnr': lambda a: a,
+    'winwidth': lambda a: '40',
+    'winheight': lambda a: '30',
+    'matchaddpos': lambda a: _new_id(),
+    'timer_start': lambda a: _new_id(),
+    'fnamemodify': lambda a: os.getcwd(),
+    'expand': lambda a: os.getcwd(),
+    'bufexists': lambda a: '0',
+    'matchstrpos': _matchstrpos,
+    'strdisplaywidth': _strdisplaywidth,
+    'len': lambda a: str(len(_string(a).encode('utf-8'))),
+    'exists': lambda a: '1',
+    'lf#highlight': _highlight,
+}
+
+
+def eval(expr):
+    calls['eval'] += 1
+    expr = expr.strip()
+    if expr in options:
+        return options[expr]
+    items = [x.strip() for x in expr.strip('[]').split(',')]
+    if expr.startswith('[') and all(x in options for x in items):
+        calls['<expr>'] += 1
+        return [options[x] for x in items]
+    m = re.match(r'([\w#:]+)\((.*)\)(.*)$', expr, re.S)
+    if m:
+        name = m.group(1)
+        calls[name] += 1
+        f = FUNCS.get(name)
+        if f is not None:
+            return f(m.group(2))
+        return '0'
+    calls['<expr>'] += 1
+    return '0'
+
+
+def command(cmd):
+    calls['command'] += 1
+    m = re.match(r'call ([\w#:]+)\(', cmd)
+    if m:
+        calls[m.group(1)] += 1
+    cmds.append(cmd)
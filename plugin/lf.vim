@@ -18,6 +18,8 @@ call s:init_var("outer_padding", [0, 1, 0, 1])
 call s:init_var("border", [1, 1, 1, 1])
 call s:init_var("sort_dir_first", 1)
 call s:init_var("sort_ignorecase", 1)
+call s:init_var("sort_order", "name")
+call s:init_var("sort_reverse", 0)
 call s:init_var("file_numbered", 0)
 call s:init_var("cache_path", "~/.vim/cache/vim-lf")
 call s:init_var("auto_keep_open", 0)
@@ -27,6 +29,31 @@ call s:init_var("mode_filter", "FILTER")
 call s:init_var("mode_keep_open", "KEEP")
 call s:init_var("restore_pos", 1)
 call s:init_var("max_regex_search_history", 50)
+call s:init_var("listing_cache_size", 64)
+call s:init_var("render_threshold", 1000)
+call s:init_var("render_margin", 100)
+call s:init_var("preview_delay", 50)
+call s:init_var("preview_mode", "head")
+call s:init_var("preview_bytes", 16384)
+call s:init_var("preview_syntax", 1)
+call s:init_var("search_backend", "python")
+call s:init_var("fuzzy_limit", 100)
+call s:init_var("scan_interval", 100)
+call s:init_var("scan_max_depth", 0)
+call s:init_var("scan_max_entries", 500000)
+call s:init_var("ignore", ['.git/', '.hg/', '.svn/', 'node_modules/', '__pycache__/', '.venv/'])
+call s:init_var("respect_ignore_files", 1)
+call s:init_var("use_index", 0)
+call s:init_var("grep_workers", 0)
+call s:init_var("grep_max_size", 4)
+call s:init_var("grep_max_hits", 10000)
+call s:init_var("watch", 1)
+call s:init_var("watch_interval", 200)
+call s:init_var("watch_max_delay", 1000)
+call s:init_var("transfer_workers", 4)
+call s:init_var("job_interval", 200)
+call s:init_var("trash", 0)
+call s:init_var("profile", 0)
 
 let g:vlf_mapping_main = {}
 let g:vlf_mapping_cli = {}
@@ -85,6 +112,11 @@ call s:init_action_main("touch_edit", "t")
 call s:init_action_main("delete", "d")
 call s:init_action_main("delete_all", "D")
 call s:init_action_main("rename", "r")
+call s:init_action_main("copy", "y")
+call s:init_action_main("cut", "x")
+call s:init_action_main("paste", "p")
+call s:init_action_main("cancel_job", "c")
+call s:init_action_main("sort", "S")
 call s:init_action_main("quit", "q")
 call s:init_action_main("change_keep_open", "\<space>")
 call s:init_action_main("select", "v")
@@ -94,6 +126,8 @@ call s:init_action_main("change_active", "o")
 call s:init_action_main("resize", "R")
 call s:init_action_main("regex_search", "/")
 call s:init_action_main("regex_search_all", "?")
+call s:init_action_main("fuzzy_search", "f")
+call s:init_action_main("grep", "F")
 call s:init_action_main("filter_dir", ";")
 call s:init_action_main("filter_file", "'")
 call s:init_action_main("filter_ext", ",")
@@ -115,6 +149,7 @@ call s:init_action_msg("cancel", ["n", "\<esc>"])
 
 command! -bar -nargs=1 Lf call lf#start(<q-args>)
 command! -bar -nargs=0 LfLog call lf#check_log()
+command! -bar -nargs=? -complete=custom,lf#profile_complete LfProfile call lf#profile(<q-args>)
 command! -bar -nargs=0 LfClearLog call lf#clear_log()
 
 augroup Vimlf
@@ -0,0 +1,64 @@
+import os
+import logging
+from collections import OrderedDict
+from .option import lfopt
+
+
+logger = logging.getLogger()
+
+
+class ListingCache(object):
+    """
+    LRU cache of parsed directory listings, a listing is reused only if the
+    mtime of the directory is unchanged. that mtime does not change when a
+    file is written, so the size and mtime of cached entries may be
+    outdated, users of them stat the entries again
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+    def _key(self, panel):
+        try:
+            mtime = os.stat(panel.cwd).st_mtime_ns
+        except OSError:
+            return None
+        return (str(panel.cwd), mtime, panel.show_hidden,
+                lfopt.sort_dir_first, lfopt.sort_ignorecase)
+
+    def get(self, panel, build, revalidate=None):
+        """
+        return cached Text of panel, or the one made by build() on cache miss,
+        revalidate(T) is called on a cached T
+        """
+        key = self._key(panel)
+        if key is None or self.maxsize <= 0:
+            return build()
+        T = self._cache.get(key)
+        if T is not None:
+            self._cache.move_to_end(key)
+            if revalidate is not None:
+                revalidate(T)
+            return T
+        T = build()
+        for k in [k for k in self._cache if k[0] == key[0] and k[1] != key[1]]:
+            del self._cache[k]  # outdated listings of the same directory
+        self._cache[key] = T
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return T
+
+    def invalidate(self, path=None):
+        """
+        drop cached listings of path, or all listings if path is None
+        """
+        if path is None:
+            self._cache.clear()
+            return
+        path = str(path)
+        for key in [k for k in self._cache if k[0] == path]:
+            del self._cache[key]
+        logger.info("invalidate listing cache of {}".format(path))
+
+
+listing_cache = ListingCache(lfopt.listing_cache_size)
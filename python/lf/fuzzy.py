@@ -0,0 +1,355 @@
+import heapq
+import logging
+import re
+from itertools import compress
+from .width import bytelen
+
+logger = logging.getLogger()
+
+SCORE_MATCH = 16
+BONUS_SEP = 10  # after path separator
+BONUS_BOUNDARY = 8  # after _-. or space
+BONUS_CAMEL = 7
+BONUS_CONSECUTIVE = 4
+BONUS_BASENAME = 2
+PENALTY_GAP_START = 3
+PENALTY_GAP_EXTENSION = 1
+
+# any character but these may give a camel or boundary bonus anywhere
+_loose = re.compile(r'[^a-z0-9/_.\- ]').search
+
+
+def _bonus(text, i):
+    if i == 0:
+        return BONUS_SEP
+    prev, ch = text[i - 1], text[i]
+    if prev == '/':
+        return BONUS_SEP
+    if prev in '_-. ':
+        return BONUS_BOUNDARY
+    if prev.islower() and ch.isupper():
+        return BONUS_CAMEL
+    if not prev.isalnum() and ch.isalnum():
+        return BONUS_BOUNDARY
+    return 0
+
+
+def _heads(ch, texts, loose, first, offset=0):
+    """
+    highest bonus ch can get in each text when it does not follow the
+    previous matched character, plus offset
+    """
+    sep, under, dash, dot, space = ['/' + ch, '_' + ch, '-' + ch, '.' + ch, ' ' + ch]
+    on_sep, on_boundary = offset + BONUS_SEP, offset + BONUS_BOUNDARY
+    return [
+            on_sep if sep in t or first and t.startswith(ch)
+            else on_boundary if o or under in t or dash in t or dot in t or space in t
+            else offset for t, o in zip(texts, loose)]
+
+
+def _run(needle):
+    """
+    score of needle matched without gap in basename, but for the bonus of
+    its first character
+    """
+    return len(needle) * (SCORE_MATCH + BONUS_BASENAME) + sum(
+            BONUS_CONSECUTIVE + _bonus(needle, j) for j in range(1, len(needle)))
+
+
+def _bounds(needle, texts, ends, runs, gaps, sure=True):
+    """
+    upper bound of the score of the shortest window of a match of needle
+    ending at each end, less _run(needle): runs if the window has no gap,
+    else the gaps cost its span, which starts at or before the last
+    needle[0] leaving room for the rest. a window found without gap may
+    still have one unless sure
+    """
+    m = len(needle)
+    first = needle[0]
+    return [
+            (run if sure or gap <= PENALTY_GAP_EXTENSION else run + gap - PENALTY_GAP_EXTENSION)
+            if text.startswith(needle, end - m + 1)
+            else run + gap - PENALTY_GAP_EXTENSION * ((end - m + 1 - text.rfind(first, 0, end - m + 2)) or 1)
+            for text, end, run, gap in zip(texts, ends, runs, gaps)]
+
+
+def _last(pattern, haystack, start):
+    """
+    position of the last char of the leftmost subsequence match of pattern
+    in haystack[start:], -1 if there is none
+    """
+    pos = start - 1
+    for ch in pattern:
+        pos = haystack.find(ch, pos + 1)
+        if pos < 0:
+            break
+    return pos
+
+
+def _window(pattern, haystack, start, end):
+    """
+    positions of the shortest window of a subsequence match of pattern in
+    haystack[start:] that ends at end
+    """
+    pos = end + 1
+    for ch in reversed(pattern):
+        pos = haystack.rfind(ch, start, pos)
+    positions = []
+    pos -= 1
+    for ch in pattern:
+        pos = haystack.find(ch, pos + 1, end + 1)
+        positions.append(pos)
+    return positions
+
+
+def _score(text, positions, basename):
+    score = 0
+    prev = -1
+    for p in positions:
+        s = SCORE_MATCH + _bonus(text, p)
+        if p == prev + 1 and prev >= 0:
+            s += BONUS_CONSECUTIVE
+        elif prev >= 0:
+            s -= PENALTY_GAP_START + PENALTY_GAP_EXTENSION * (p - prev - 2)
+        if p >= basename:
+            s += BONUS_BASENAME
+        score += s
+        prev = p
+    return score
+
+
+def _match(pattern, text, haystack, basename, end, base_end=None):
+    """
+    score and positions of the better of the leftmost match, ending at end,
+    and the leftmost match in basename, ending at base_end if not None
+    """
+    positions = _window(pattern, haystack, 0, end)
+    score = _score(text, positions, basename)
+    if basename > positions[0]:  # try to match in basename only
+        if base_end is None:
+            base_end = _last(pattern, haystack, basename)
+        if base_end >= 0:
+            in_base = _window(pattern, haystack, basename, base_end)
+            base_score = _score(text, in_base, basename)
+            if base_score > score:
+                score, positions = base_score, in_base
+    return score, positions
+
+
+def fuzzy_match(pattern, text, ignorecase):
+    """
+    score and matched character positions of pattern in text, None if
+    pattern is not a subsequence of text
+    """
+    haystack = text.lower() if ignorecase else text
+    end = _last(pattern, haystack, 0)
+    if end < 0:
+        return None
+    return _match(pattern, text, haystack, text.rstrip('/').rfind('/') + 1, end)
+
+
+class FuzzySearch(object):
+    """
+    rank lines whose text contains the pattern as a subsequence, the state
+    of shorter patterns is kept so that typing a character only rescans the
+    lines still matching
+    """
+    def __init__(self, text, search_panel, limit):
+        self.text = text
+        self.search_panel = search_panel
+        self.limit = limit
+        self._texts = {}
+        # length, start of basename and whether characters may get bonuses
+        # not known from the pattern, of each line
+        self._lens = []
+        self._bases = []
+        self._loose = []
+        self._width = 1
+        self._add_lines(text)
+        self._base(True)
+        # (pattern, ignorecase, state)
+        self._stack = []
+
+    def _pattern(self):
+        return self.search_panel.cmd
+
+    def _add_lines(self, lines):
+        texts = [line.raw_text for line in lines]
+        self._lens.extend(map(len, texts))
+        self._bases.extend(text.rstrip('/').rfind('/') + 1 for text in texts)
+        self._loose.extend(_loose(text) is not None for text in texts)
+        self._width = max(self._width, max(self._lens, default=0) + 1)
+
+    def _base(self, ignorecase, start=0):
+        """
+        state of empty pattern from line start on, see _extend()
+        """
+        if ignorecase not in self._texts:
+            self._texts[ignorecase] = self._raw_texts(self.text, ignorecase)
+        texts = self._texts[ignorecase][start:]
+        return list(range(start, start + len(texts))), texts, [-1] * len(texts), [], self._loose[start:], [], []
+
+    def _raw_texts(self, lines, ignorecase):
+        texts = [line.raw_text for line in lines]
+        if ignorecase:
+            texts = list(map(str.lower, texts))
+        return texts
+
+    def _extend(self, state, needle):
+        """
+        state of needle from that of needle[:-1], for each remaining line:
+        index, text, position of last matched char of the leftmost match and,
+        from two characters on, of the leftmost match in basename, whether it
+        is loose, what its bonuses may add to _run(needle) and, from two
+        characters on, what gaps may add to that
+        """
+        index_list, texts, lasts, base_lasts, loose, runs, gaps = state
+        ch = needle[-1]
+        j = len(needle) - 1
+        found = [text.find(ch, last + 1) for text, last in zip(texts, lasts)]
+        keep = [pos >= 0 for pos in found]
+        index_list = list(compress(index_list, keep))
+        texts = list(compress(texts, keep))
+        lasts = list(compress(found, keep))
+        loose = list(compress(loose, keep))
+        if j == 0:
+            return index_list, texts, lasts, [], loose, _heads(ch, texts, loose, True), []
+        if j == 1:
+            # no match in basename if it is the whole text
+            base_lasts = [base - 1 if base else -2 for base in map(self._bases.__getitem__, index_list)]
+        else:
+            base_lasts = list(compress(base_lasts, keep))
+        for c in needle if j == 1 else ch:
+            base_lasts = [text.find(c, last + 1) if last >= 0 else last for text, last in zip(texts, base_lasts)]
+        runs = list(compress(runs, keep))
+        # a gap before ch trades the consecutive score for a head bonus, the
+        # extension penalty is paid by the span of the match
+        pair = _bonus(needle, j)
+        trades = _heads(ch, texts, loose, False, PENALTY_GAP_EXTENSION - PENALTY_GAP_START - BONUS_CONSECUTIVE - pair)
+        if needle[j - 1].isalpha() and ch.isalpha() and pair < BONUS_CAMEL and any(loose):
+            extra = BONUS_CAMEL - pair  # camel case in loose texts
+            runs = [run + extra if o else run for run, o in zip(runs, loose)]
+            trades = [trade - extra if o else trade for trade, o in zip(trades, loose)]
+        if j == 1:
+            gaps = trades
+        else:
+            # best sum of trades of at least one gap
+            gaps = [
+                    total + trade if total > 0 < trade else max(total, trade)
+                    for total, trade in zip(compress(gaps, keep), trades)]
+        return index_list, texts, lasts, base_lasts, loose, runs, gaps
+
+    def extend(self, lines):
+        """
+        add the state of lines appended to self.text to each cached pattern
+        """
+        start = len(self.text) - len(lines)
+        for ignorecase, texts in self._texts.items():
+            texts.extend(self._raw_texts(lines, ignorecase))
+        self._add_lines(lines)
+        if not self._stack:
+            return
+        ignorecase = self._stack[0][1]  # same for all patterns in stack
+        state = self._base(ignorecase, start)
+        for pattern, _, old in self._stack:
+            state = self._extend(state, pattern.lower() if ignorecase else pattern)
+            for old_list, new_list in zip(old, state):
+                old_list.extend(new_list)
+
+    def _state(self, pattern, ignorecase):
+        stack = self._stack
+        while stack and not (pattern.startswith(stack[-1][0]) and stack[-1][1] == ignorecase):
+            stack.pop()
+        if stack:
+            prefix, _, state = stack[-1]
+        else:
+            prefix, state = '', self._base(ignorecase)
+        needle = pattern.lower() if ignorecase else pattern
+        for n in range(len(prefix), len(pattern)):
+            state = self._extend(state, needle[:n + 1])
+            stack.append((pattern[:n + 1], ignorecase, state))
+        return state
+
+    def filter(self):
+        """
+        best self.limit lines and byte positions of their matched characters
+        """
+        pattern = self._pattern()
+        if pattern == '':
+            return self.text, []
+        ignorecase = pattern == pattern.lower()  # smartcase
+        state = self._state(pattern, ignorecase)
+        logger.info('fuzzy pattern "{}" matches {} lines'.format(pattern, len(state[0])))
+        needle = pattern.lower() if ignorecase else pattern
+        return self._rank(needle, state, ignorecase)
+
+    def _bounds(self, needle, state):
+        """
+        upper bound of the score of each line less _run(needle), from the
+        windows fuzzy_match() scores: the leftmost match and the leftmost
+        match in basename
+        """
+        _, texts, lasts, base_lasts, _, runs, gaps = state
+        if len(needle) == 1:
+            return runs
+        bounds = _bounds(needle, texts, lasts, runs, gaps)
+        in_base = [last >= 0 for last in base_lasts]
+        base_bounds = iter(_bounds(
+                needle, compress(texts, in_base), compress(base_lasts, in_base),
+                compress(runs, in_base), compress(gaps, in_base), '/' not in needle))
+        return [max(bound, next(base_bounds)) if b else bound for bound, b in zip(bounds, in_base)]
+
+    def _rank(self, needle, state, ignorecase):
+        """
+        score lines in decreasing order of their upper bound and stop once
+        self.limit lines beat the bound of the rest, ties are broken by length
+        and index as if all lines were scored
+        """
+        index_list, texts, lasts, base_lasts = state[:4]
+        limit = self.limit
+        if not index_list or limit <= 0:
+            return [], []
+        bounds = self._bounds(needle, state)
+        lens = self._lens
+        bases = self._bases
+        n = len(index_list)
+        width = self._width
+        top = max(bounds)
+        run = _run(needle)
+        if len(needle) == 1:  # the match in basename is not kept for one char
+            base_lasts = [None] * n
+        # ordered by bound, then length and index, as index_list is sorted
+        keys = [((top - bound) * width + lens[i]) * n + k for k, i, bound in zip(range(n), index_list, bounds)]
+        # (score, -length, -k, positions) with the worst first
+        best = []
+        # key of a line whose bound ties with the worst score and which
+        # would sort after the worst line, so that no line from there on
+        # can enter best
+        stop = float('inf')
+        for key in sorted(keys):
+            if key > stop:
+                break
+            k = key % n
+            i = index_list[k]
+            score, positions = _match(needle, self.text[i].raw_text, texts[k], bases[i], lasts[k], base_lasts[k])
+            if len(best) < limit:
+                heapq.heappush(best, (score, -lens[i], -k, positions))
+            elif score >= best[0][0] and (score, -lens[i], -k) > best[0][:3]:
+                heapq.heapreplace(best, (score, -lens[i], -k, positions))
+            else:
+                continue
+            if len(best) == limit:
+                score, neg_len, neg_k = best[0][:3]
+                stop = ((top + run - score) * width - neg_len) * n - neg_k
+        lines = []
+        pos_list = []
+        for _, _, neg_k, positions in sorted(best, reverse=True):
+            line = self.text[index_list[-neg_k]]
+            lines.append(line)
+            pos_list.append(self._byte_pos(line.raw_text, positions))
+        return lines, pos_list
+
+    def _byte_pos(self, text, positions):
+        if text.isascii():
+            return [(p + 1, 1) for p in positions]
+        return [(bytelen(text[:p]) + 1, bytelen(text[p])) for p in positions]
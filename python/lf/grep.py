@@ -0,0 +1,133 @@
+import re
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .scan import walk
+from .regex import translate, Untranslatable
+
+
+logger = logging.getLogger()
+
+
+def compile_grep(pattern, ignorecase):
+    """
+    bytes regex of vim pattern, the pattern is searched literally if it can
+    not be translated
+    """
+    try:
+        py_pattern, case = translate(pattern)
+        if case is not None:
+            ignorecase = case
+        return re.compile(py_pattern.encode('utf-8'), re.M | (re.I if ignorecase else 0))
+    except (Untranslatable, re.error) as e:
+        logger.info('search "{}" literally: {}'.format(pattern, e))
+        return re.compile(re.escape(pattern.encode('utf-8')), re.I if ignorecase else 0)
+
+
+class Grep(object):
+    """
+    search the contents of files under cwd with a thread pool, the hits
+    (entry, lnum, col, text) are taken in batches by the main thread
+
+    threads are used rather than processes as python runs inside vim, where
+    sys.executable is vim itself and forking would copy the editor
+    """
+    sniff_size = 8192
+    max_line_len = 256
+    max_file_hits = 1000
+
+    def __init__(self, cwd, regex, ignore, workers, max_size, max_hits):
+        self.cwd = cwd
+        self.regex = regex
+        self.ignore = ignore
+        self.workers = workers
+        self.max_size = max_size
+        self.max_hits = max_hits
+        self.files = 0  # number of files searched
+        self.hits = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def take(self):
+        """
+        hits found since last call
+        """
+        with self._lock:
+            hits, self._pending = self._pending, []
+        return hits
+
+    def _run(self):
+        logger.info("start grep {} in {}".format(self.regex.pattern, self.cwd))
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = deque()
+            for entries in walk(self.cwd, 0, self.ignore):
+                if self._cancel.is_set():
+                    break
+                for entry in entries:
+                    if entry.is_file and 0 < entry.size <= self.max_size:
+                        futures.append(pool.submit(self._search, entry))
+                # bound the number of queued files
+                while len(futures) > self.workers * 64:
+                    futures.popleft().result()
+            for future in futures:
+                future.result()
+        logger.info("grep searched {} files with {} hits".format(self.files, self.hits))
+
+    def _search(self, entry):
+        if self._cancel.is_set():
+            return
+        try:
+            with open(entry.path_str, 'rb') as f:
+                data = f.read(self.max_size)
+        except OSError as e:
+            logger.info(e)
+            return
+        hits = []
+        if b'\0' not in data[:self.sniff_size]:
+            self._search_data(entry, data, hits)
+        with self._lock:
+            self.files += 1
+            if hits and not self._cancel.is_set():
+                hits = hits[:self.max_hits - self.hits]
+                self._pending.extend(hits)
+                self.hits += len(hits)
+                if self.hits >= self.max_hits:
+                    logger.warning("stop grep at {} hits".format(self.hits))
+                    self._cancel.set()
+
+    def _search_data(self, entry, data, hits):
+        """
+        first match of each matching line, line numbers are counted only
+        between matches
+        """
+        search = self.regex.search
+        lnum, counted = 1, 0
+        pos = 0
+        while len(hits) < self.max_file_hits:
+            m = search(data, pos)
+            if m is None:
+                break
+            start = data.rfind(b'\n', 0, m.start()) + 1
+            end = data.find(b'\n', m.start())
+            if end < 0:
+                end = len(data)
+            lnum += data.count(b'\n', counted, start)
+            counted = start
+            text = data[start:min(end, start + self.max_line_len)]
+            text = text.decode('utf-8', 'replace').rstrip('\r').replace('\t', ' ')
+            hits.append((entry, lnum, m.start() - start + 1, text))
+            pos = end + 1
+            if pos > len(data):
+                break
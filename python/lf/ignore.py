@@ -0,0 +1,177 @@
+import re
+import logging
+from pathlib import Path
+
+
+logger = logging.getLogger()
+
+IGNORE_FILES = ('.gitignore', '.ignore')
+
+
+def _translate(glob):
+    """
+    python regex of a gitignore glob without leading ! and trailing /
+    """
+    anchored = '/' in glob
+    glob = glob.lstrip('/')
+    out = []
+    i, n = 0, len(glob)
+    while i < n:
+        ch = glob[i]
+        if glob.startswith('**/', i) and (i == 0 or glob[i - 1] == '/'):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if glob.startswith('**', i) and i + 2 == n and (i == 0 or glob[i - 1] == '/'):
+            out.append('.*')
+            break
+        if ch == '*':
+            out.append('[^/]*')
+        elif ch == '?':
+            out.append('[^/]')
+        elif ch == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        elif ch == '[':
+            end = glob.find(']', i + 2)
+            if end < 0:
+                out.append('\\[')
+            else:
+                body = glob[i + 1:end]
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        else:
+            out.append(re.escape(ch))
+        i += 1
+    regex = ''.join(out)
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    return regex
+
+
+class Rule(object):
+    __slots__ = ('negate', 'dir_only', 'regex')
+
+    def __init__(self, line, negate):
+        self.negate = negate
+        self.dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        self.regex = re.compile(_translate(line) + r'\Z', re.S)
+
+    def match(self, rel, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.match(rel) is not None
+
+
+class RuleSet(object):
+    """
+    rules of an ignore file, the last matching rule wins
+    """
+    def __init__(self, lines):
+        self.rules = []
+        for line in lines:
+            line = line.rstrip('\r')
+            while line.endswith(' ') and not line.endswith('\\ '):
+                line = line[:-1]
+            if line == '' or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate or line.startswith('\\!') or line.startswith('\\#'):
+                line = line[1:]
+            if line.strip('/'):
+                self.rules.append(Rule(line, negate))
+        self._has_negate = any(rule.negate for rule in self.rules)
+        # a single regex that tells whether any rule may match
+        self._any = re.compile('|'.join(
+            '(?:{})'.format(rule.regex.pattern) for rule in self.rules) or '(?!)', re.S)
+
+    @classmethod
+    def from_dir(cls, path):
+        lines = []
+        for name in IGNORE_FILES:
+            try:
+                with open(path / name, encoding='utf-8', errors='replace') as f:
+                    lines.extend(f.read().splitlines())
+            except OSError:
+                continue
+        return cls(lines) if lines else None
+
+    def match(self, rel, is_dir):
+        """
+        True if ignored, False if re-included, None if no rule matches
+        """
+        if self._any.match(rel) is None:
+            return None
+        if not self._has_negate:
+            if any(rule.match(rel, is_dir) for rule in self.rules):
+                return True
+            return None
+        for rule in reversed(self.rules):
+            if rule.match(rel, is_dir):
+                return not rule.negate
+        return None
+
+
+class Ignore(object):
+    """
+    ignore rules that apply under a directory, rules in deeper directories
+    take precedence
+    """
+    def __init__(self, specs, respect_files=True):
+        self.specs = specs  # [(base path string ending with /, RuleSet)]
+        self.respect_files = respect_files
+
+    @classmethod
+    def for_root(cls, cwd, globs, respect_files):
+        """
+        rules of globs and of the ignore files in the ancestors of cwd up to
+        the root of its git repository
+        """
+        cwd = Path(cwd)
+        specs = []
+        if globs:
+            specs.append((cls._base(cwd), RuleSet(globs)))
+        if respect_files:
+            ancestors = []
+            for parent in cwd.parents:
+                ancestors.append(parent)
+                if (parent / '.git').exists():
+                    break
+            else:
+                ancestors = []  # not in a repository
+            if (cwd / '.git').exists():
+                ancestors = []
+            for parent in reversed(ancestors):
+                rules = RuleSet.from_dir(parent)
+                if rules is not None:
+                    specs.append((cls._base(parent), rules))
+        return cls(specs, respect_files)
+
+    @staticmethod
+    def _base(path):
+        base = str(path)
+        return base if base.endswith('/') else base + '/'
+
+    def child(self, path, names):
+        """
+        rules under directory path whose entry names are given, path may be a
+        str or a Path
+        """
+        if not self.respect_files or not any(name in names for name in IGNORE_FILES):
+            return self
+        rules = RuleSet.from_dir(Path(path))
+        if rules is None:
+            return self
+        logger.info("read ignore rules in {}".format(path))
+        return Ignore(self.specs + [(self._base(path), rules)], True)
+
+    def ignored(self, entry):
+        path = entry.path_str
+        for base, rules in reversed(self.specs):
+            result = rules.match(path[len(base):], entry.is_dir)
+            if result is not None:
+                return result
+        return False
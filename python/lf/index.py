@@ -0,0 +1,201 @@
+import os
+import mmap
+import struct
+import hashlib
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from collections import deque
+from pathlib import Path
+from .scan import Entry, scandir
+
+
+logger = logging.getLogger()
+
+MAGIC = b'VLFIDX01'
+# magic, number of directories, number of entries, bytes of directory paths,
+# bytes of entry paths
+_HEADER = struct.Struct('<8sIIQQ')
+_IS_DIR, _IS_FILE, _IS_LINK = 1, 2, 4
+
+
+def _encode(paths):
+    return '\n'.join(paths).encode('utf-8', 'surrogateescape')
+
+
+def _decode(data):
+    if not data:
+        return []
+    return data.decode('utf-8', 'surrogateescape').split('\n')
+
+
+class FileIndex(object):
+    """
+    file names under root, with the mtime of each directory so that only
+    changed directories are scanned again
+
+    on disk the relative paths are stored sorted and joined by newlines, the
+    directory mtimes and entry flags, sizes and mtimes in typed arrays:
+
+        header | dir mtimes | flags | sizes | mtimes | dir paths | entry paths
+    """
+    def __init__(self, root, file):
+        self.root = root
+        self.file = file
+        self.lock = threading.Lock()
+        self.dirs = {}  # relative dir -> mtime_ns
+        self.entries = {}  # relative dir -> [(name, flags, size, mtime)]
+        self.loaded = False
+        self.dirty = False
+
+    def _rel(self, path):
+        rel = str(path)[len(str(self.root)):]
+        return rel.lstrip('/')
+
+    def _join(self, rel_dir, name):
+        return name if rel_dir == '' else rel_dir + '/' + name
+
+    def load(self):
+        """
+        read the index file, an invalid or missing file gives an empty index
+        """
+        self.loaded = True
+        try:
+            with open(self.file, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                self._parse(mm)
+        except (OSError, ValueError, struct.error) as e:
+            logger.info("no valid index of {}: {}".format(self.root, e))
+            self.dirs, self.entries = {}, {}
+
+    def _parse(self, mm):
+        magic, ndir, nentry, dir_bytes, entry_bytes = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError('bad magic')
+        offset = _HEADER.size
+        columns = []
+        for typecode, n in (('q', ndir), ('B', nentry), ('Q', nentry), ('d', nentry)):
+            column = array(typecode)
+            size = column.itemsize * n
+            column.frombytes(mm[offset:offset + size])
+            columns.append(column)
+            offset += size
+        dir_mtimes, flags, sizes, mtimes = columns
+        dir_paths = _decode(mm[offset:offset + dir_bytes])
+        offset += dir_bytes
+        paths = _decode(mm[offset:offset + entry_bytes])
+        if len(dir_paths) != ndir or len(paths) != nentry:
+            raise ValueError('truncated index')
+        self.dirs = dict(zip(dir_paths, dir_mtimes))
+        self.entries = {rel: [] for rel in dir_paths}
+        for path, flag, size, mtime in zip(paths, flags, sizes, mtimes):
+            parent, _, name = path.rpartition('/')
+            records = self.entries.get(parent)
+            if records is not None:
+                records.append((name, flag, size, mtime))
+        logger.info("load index of {}: {} entries".format(self.root, nentry))
+
+    def save(self):
+        if not self.dirty:
+            return
+        dir_paths = sorted(self.dirs)
+        items = sorted(
+                (self._join(rel, record[0]), record)
+                for rel, records in self.entries.items() for record in records)
+        dir_data = _encode(dir_paths)
+        entry_data = _encode([path for path, _ in items])
+        tmp = self.file.with_suffix('.tmp')
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(_HEADER.pack(MAGIC, len(dir_paths), len(items),
+                                     len(dir_data), len(entry_data)))
+                f.write(array('q', [self.dirs[rel] for rel in dir_paths]).tobytes())
+                f.write(array('B', [r[1] for _, r in items]).tobytes())
+                f.write(array('Q', [r[2] for _, r in items]).tobytes())
+                f.write(array('d', [r[3] for _, r in items]).tobytes())
+                f.write(dir_data)
+                f.write(entry_data)
+            os.replace(tmp, self.file)
+            self.dirty = False
+            logger.info("save index of {}: {} entries".format(self.root, len(items)))
+        except OSError as e:
+            logger.error(e)
+
+    def refresh(self, ignore, cancel):
+        """
+        scan again the directories whose mtime changed, unchanged ones keep
+        their entries, return False if cancelled
+        """
+        dirs, entries = {}, {}
+        queue = deque([('', ignore)])
+        rescanned = 0
+        while queue:
+            if cancel.is_set():
+                return False
+            rel, ignore = queue.popleft()
+            path = os.path.join(str(self.root), rel)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            records = self.entries.get(rel)
+            if records is None or self.dirs.get(rel) != mtime:
+                records, ignore = self._scan(path, ignore)
+                rescanned += 1
+            elif ignore is not None:
+                ignore = ignore.child(path, {r[0] for r in records})
+            dirs[rel] = mtime
+            entries[rel] = records
+            queue.extend(
+                    (self._join(rel, r[0]), ignore) for r in records
+                    if r[1] & _IS_DIR and not r[1] & _IS_LINK)
+        if rescanned or dirs.keys() != self.dirs.keys():
+            self.dirty = True
+        self.dirs, self.entries = dirs, entries
+        logger.info("refresh index of {}: {} of {} directories scanned".format(
+            self.root, rescanned, len(dirs)))
+        return True
+
+    def _scan(self, path, ignore):
+        found = scandir(path)
+        if ignore is not None:
+            ignore = ignore.child(path, {e.name for e in found})
+            found = [e for e in found if not ignore.ignored(e)]
+        records = [
+                (e.name, _IS_DIR * e.is_dir | _IS_FILE * e.is_file | _IS_LINK * e.is_link,
+                 e.size, e.mtime)
+                for e in found]
+        return records, ignore
+
+    def iter_entries(self, cwd):
+        """
+        Entry of each indexed path under cwd, in sorted order of directories
+        """
+        prefix = self._rel(cwd)
+        dirs = sorted(self.dirs)
+        if prefix:
+            start = bisect_left(dirs, prefix)
+            dirs = [d for d in dirs[start:bisect_left(dirs, prefix + '0')]
+                    if d == prefix or d.startswith(prefix + '/')]
+        root = str(self.root).rstrip('/')
+        for rel in dirs:
+            base = root + '/' + rel if rel else root
+            for name, flag, size, mtime in self.entries[rel]:
+                yield Entry(base + '/' + name, name, bool(flag & _IS_DIR),
+                            bool(flag & _IS_FILE), bool(flag & _IS_LINK), size, mtime)
+
+
+_indexes = {}
+
+
+def get_index(root, cache_path):
+    """
+    index of root, loaded from disk on first use in the worker thread
+    """
+    root = Path(root)
+    index = _indexes.get(root)
+    if index is None:
+        name = hashlib.sha1(str(root).encode('utf-8', 'surrogateescape')).hexdigest()
+        index = _indexes[root] = FileIndex(root, cache_path / (name[:16] + '.idx'))
+    return index
@@ -0,0 +1,305 @@
+import os
+import time
+import errno
+import shutil
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from .utils import human_size
+
+
+logger = logging.getLogger()
+
+# errors of copy_file_range or sendfile that mean the call is not supported
+# for this pair of files, the copy falls back to the next method
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+
+class Job(threading.Thread):
+    """
+    file operation run in a worker thread by _run of subclasses, progress
+    is counted in bytes
+    """
+    verb = ''
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.total = 0
+        self.done = 0
+        self.errors = []
+        self.touched = set()  # directories whose listing changed
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._start_time = None
+        self._end_time = None
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _add(self, n):
+        with self._lock:
+            self.done += n
+
+    def _error(self, e):
+        logger.error(e)
+        with self._lock:
+            self.errors.append(e)
+
+    def run(self):
+        self._start_time = time.monotonic()
+        try:
+            self._run()
+        except Exception as e:
+            self._error(e)
+        self._end_time = time.monotonic()
+        logger.info("{} {} of {} bytes in {:.2f}s, {} errors{}".format(
+            self.verb, self.done, self.total, self._end_time - self._start_time,
+            len(self.errors), ", cancelled" if self.cancelled else ""))
+
+    def progress(self):
+        """
+        percent done and throughput
+        """
+        if self._start_time is None:
+            return " {} ".format(self.verb)
+        elapsed = (self._end_time or time.monotonic()) - self._start_time
+        rate = self.done / elapsed if elapsed > 0 else 0
+        percent = 100 * self.done // self.total if self.total else 0
+        return " {} {}% {}/s ".format(self.verb, percent, human_size(int(rate)))
+
+
+def free_path(path, taken=()):
+    """
+    path itself if it neither exists nor is in taken, else path with the
+    first free number appended to its stem
+    """
+    if not os.path.lexists(path) and path not in taken:
+        return path
+    n = 1
+    while True:
+        candidate = path.with_name("{}_{}{}".format(path.stem, n, path.suffix))
+        if not os.path.lexists(candidate) and candidate not in taken:
+            return candidate
+        n += 1
+
+
+class Transfer(Job):
+    """
+    copy or move sources into directory dest, files are copied in parallel
+    by a bounded thread pool, moves in the same filesystem are renames
+    """
+    chunk_size = 8 * 1048576
+
+    def __init__(self, sources, dest, move, workers):
+        super().__init__()
+        self.sources = sources
+        self.dest = Path(dest)
+        self.move = move
+        self.workers = workers
+        self.verb = 'move' if move else 'copy'
+        # the fastest copy method that works, lowered on the first failure
+        self._method = 'copy_file_range' if hasattr(os, 'copy_file_range') else \
+            'sendfile' if hasattr(os, 'sendfile') else 'read'
+
+    def _run(self):
+        self.touched.add(self.dest)
+        plan = []
+        planned = set()  # sources of the same name, as in a recursive listing
+        for src in self.sources:
+            if self.move and src.parent == self.dest:
+                continue  # already there
+            dst = free_path(self.dest / src.name, planned)
+            planned.add(dst)
+            if src.is_dir() and not src.is_symlink() and (self.dest == src or src in self.dest.parents):
+                self._error(OSError(errno.EINVAL, "can not {} a directory into itself".format(self.verb), str(src)))
+                continue
+            if self.move:
+                self.touched.add(src.parent)
+                try:
+                    os.rename(src, dst)
+                    continue
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        self._error(e)
+                        continue
+            plan.append((src, dst))
+        dirs, files = [], []
+        for src, dst in plan:
+            self._collect(src, dst, dirs, files)
+        self.total = sum(size for _, _, size in files)
+        for src, dst in dirs:
+            try:
+                os.makedirs(dst, exist_ok=True)
+            except OSError as e:
+                self._error(e)
+        with ThreadPoolExecutor(self.workers) as pool:
+            for _ in pool.map(self._copy_file, files):
+                pass
+        # copy times after the content of directories is written
+        for src, dst in reversed(dirs):
+            try:
+                shutil.copystat(src, dst)
+            except OSError as e:
+                logger.info(e)
+        if self.move and not self.cancelled and not self.errors:
+            for src, _ in plan:
+                self._remove(src)
+
+    def _collect(self, src, dst, dirs, files):
+        """
+        directories to create and files to copy under src, in top-down order
+        """
+        if not src.is_dir() or src.is_symlink():
+            try:
+                size = 0 if src.is_symlink() else src.stat().st_size
+            except OSError as e:
+                self._error(e)
+                return
+            files.append((src, dst, size))
+            return
+        dirs.append((src, dst))
+        for root, dirnames, filenames in os.walk(src, onerror=self._error):
+            rel = os.path.relpath(root, src)
+            target = dst / rel if rel != '.' else dst
+            for name in dirnames:
+                path = Path(root, name)
+                if path.is_symlink():
+                    files.append((path, target / name, 0))
+                else:
+                    dirs.append((path, target / name))
+            for name in filenames:
+                path = Path(root, name)
+                try:
+                    size = 0 if path.is_symlink() else path.stat().st_size
+                except OSError as e:
+                    self._error(e)
+                    continue
+                files.append((path, target / name, size))
+
+    def _copy_file(self, item):
+        src, dst, size = item
+        if self.cancelled:
+            return
+        try:
+            if src.is_symlink():
+                os.symlink(os.readlink(src), dst)
+                return
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                self._copy_data(fsrc.fileno(), fdst.fileno())
+            shutil.copystat(src, dst)
+        except OSError as e:
+            self._error(e)
+        if self.cancelled:
+            try:
+                os.unlink(dst)
+            except OSError:
+                pass
+
+    def _copy_data(self, fin, fout):
+        """
+        copy in the kernel by copy_file_range or sendfile if possible
+        """
+        offset = 0
+        while not self.cancelled:
+            method = self._method
+            try:
+                if method == 'copy_file_range':
+                    n = os.copy_file_range(fin, fout, self.chunk_size)
+                elif method == 'sendfile':
+                    n = os.sendfile(fout, fin, None, self.chunk_size)
+                else:
+                    n = self._read_write(fin, fout)
+            except OSError as e:
+                if offset > 0 or method == 'read' or e.errno not in _UNSUPPORTED:
+                    raise
+                self._method = 'sendfile' if method == 'copy_file_range' else 'read'
+                logger.info("{} is not supported: {}, use {}".format(method, e, self._method))
+                continue
+            if n == 0:
+                break
+            offset += n
+            self._add(n)
+
+    def _read_write(self, fin, fout):
+        data = memoryview(os.read(fin, self.chunk_size))
+        n = len(data)
+        while data:
+            data = data[os.write(fout, data):]
+        return n
+
+    def _remove(self, path):
+        try:
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+        except OSError as e:
+            self._error(e)
+
+
+class Remove(Job):
+    """
+    delete paths, directories are removed bottom-up so that the deletion
+    can be cancelled between entries
+    """
+    verb = 'delete'
+
+    def __init__(self, paths):
+        super().__init__()
+        self.paths = paths
+
+    def _run(self):
+        for path in self.paths:
+            self.touched.add(path.parent)
+            if self.cancelled:
+                break
+            if path.is_dir() and not path.is_symlink():
+                self._rmtree(path)
+            else:
+                self._unlink(path, os.unlink)
+
+    def _rmtree(self, path):
+        for root, dirnames, filenames in os.walk(path, topdown=False, onerror=self._error):
+            for name in filenames:
+                if self.cancelled:
+                    return
+                self._unlink(os.path.join(root, name), os.unlink)
+            for name in dirnames:
+                if self.cancelled:
+                    return
+                full = os.path.join(root, name)
+                # symlinks to directories are listed as directories
+                self._unlink(full, os.unlink if os.path.islink(full) else os.rmdir)
+        self._unlink(path, os.rmdir)
+
+    def _unlink(self, path, remove):
+        try:
+            remove(path)
+            self._add(1)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self._error(e)
+
+    def progress(self):
+        return " {} {} ".format(self.verb, self.done)
+
+
+def move_to_trash(path, trash):
+    """
+    rename path into directory trash, return the new path or None if trash
+    is in another filesystem
+    """
+    target = free_path(trash / path.name)
+    try:
+        os.rename(path, target)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        return None
+    return target
@@ -1,5 +1,4 @@
 import logging
-import shutil
 import pickle
 import vim
 from collections import deque
@@ -8,6 +7,11 @@ from functools import partial, wraps
 from .utils import vimeval, vimcmd, resetg
 from .panel import *
 from .option import lfopt, PopupOption
+from .cache import listing_cache
+from .watch import create_watcher
+from .job import Transfer, Remove, move_to_trash
+from .profile import vlf_profiler
+from .width import set_options
 
 
 logger = logging.getLogger()
@@ -27,7 +31,7 @@ def _update(fun, ignore):
         fun(*args, **kwargs)
         self = args[0]
         if not ignore:
-            self._change_right()
+            self._schedule_right()
         self.info_panel.info_path()
         vimcmd("echo ''")
     return wrapper
@@ -49,6 +53,16 @@ class Manager(object):
         else:
             self.regex_search_history = deque(maxlen=lfopt.max_regex_search_history)
             logger.info("no regex search history, init as []")
+        self.fuzzy_search_history = deque(maxlen=lfopt.max_regex_search_history)
+        # the clipboard and the file operation are kept when the manager is
+        # closed
+        self.clipboard = []
+        self.clipboard_cut = False
+        self.job = None
+        self._job_timer = None
+        self._pending_jobs = deque()
+        if lfopt.profile:
+            vlf_profiler.enable()
 
     def save_regex(self, pattern):
         self.regex_search_history.appendleft(pattern)
@@ -61,6 +75,28 @@ class Manager(object):
         except Exception as e:
             logger.error(e)
 
+    def profile(self, arg):
+        """
+        :LfProfile [on|off|reset|export], show the report without argument
+        """
+        if arg == 'on':
+            vlf_profiler.enable()
+            vimcmd("let g:vlf_profile = 1")
+        elif arg == 'off':
+            vlf_profiler.disable()
+            vimcmd("let g:vlf_profile = 0")
+        elif arg == 'reset':
+            vlf_profiler.reset()
+        elif arg == 'export':
+            path = vlf_profiler.export(lfopt.profile_path)
+            vimsg("None", "profile exported to {}".format(path))
+        elif not vlf_profiler.stats:
+            vimsg("WarningMsg", "no profile, turn it on by :LfProfile on")
+        else:
+            vimcmd("vert botright new")
+            vimcmd("setlocal buftype=nofile bufhidden=wipe noswapfile nowrap")
+            vim.current.buffer[:] = vlf_profiler.report()
+
     def check_log(self):
         vimcmd("vert botright split {}".format(self._escape_path(lfopt.log_path)))
         vimcmd("norm! G")
@@ -83,10 +119,21 @@ class Manager(object):
         self.is_keep_open = False
         self.filter_select = False
         self.mode = "normal"
+        self._preview_tick = 0
+        self._preview_timer = None
+        self.scanner = None
+        self._scan_timer = None
+        self.search_panel = None
+        self.watcher = None
+        self._watch_timer = None
         self._resolve(cwd)
+        # the options can not change while the manager is open
+        set_options(*vimeval("[&ambiwidth, &tabstop, &emoji]"))
         vimcmd("set laststatus=0")
         vimcmd("set t_ve=")
         self._create()
+        self._purge_trash()
+        self._start_watch()
         self._action()
 
     def _resolve(self, cwd):
@@ -122,7 +169,7 @@ class Manager(object):
         self.border_panel = BorderPanel()
         self._init_middle()
         self._init_left()
-        self._change_right(True)
+        self._init_right()
         self.info_panel = InfoPanel(self)
 
     def _init_left(self):
@@ -137,15 +184,27 @@ class Manager(object):
             self.middle_panel._cursorline()
         logger.info("initialize cursor pos as {}".format(self.middle_panel.index))
 
+    def _init_right(self):
+        """
+        the directory and file previews are created once and reused
+        """
+        self.dir_preview = DirPanel(None, 2)
+        self.file_preview = FilePanel()
+        self.file_preview.hide()
+        self.right_panel = self.dir_preview
+        self._change_right()
+
     def resize(self):
         if not self._is_start:
             return
-        panels = ["border", "left", "middle", "right", "info", "cli", "msg", "search"]
+        panels = ["border", "left", "middle", "info", "cli", "msg", "search"]
         for panel in panels:
             try:
                 getattr(self, panel + "_panel").resize(panel)
             except:
                 pass
+        self.dir_preview.resize("right")
+        self.file_preview.resize("right")
         self.left_panel.refresh()
         self.middle_panel.refresh()
 
@@ -164,6 +223,13 @@ class Manager(object):
         logger.info("get path_list of length {}".format(len(path_list)))
         return path_list
 
+    def _get_line_list(self):
+        if self._is_select():
+            return self.v_block.selected_lines()
+        if self.empty():
+            return []
+        return [self.middle_panel.text[self.middle_panel.index]]
+
     def _action(self):
         while 1:
             try:
@@ -187,10 +253,11 @@ class Manager(object):
             self.v_block.quit()
         elif self._is_filter():
             logger.info("quit filter mode")
-            try:
-                self.search_panel.restore()
-            except AttributeError:
-                self.middle_panel.refresh(item=self._curpath())
+            if not self.middle_panel.unfilter(self._curpath()):
+                try:
+                    self.search_panel.restore()
+                except AttributeError:
+                    self.middle_panel.refresh(item=self._curpath())
             self._change_right()
             self.mode = "normal"
         if self._is_select():
@@ -233,11 +300,11 @@ class Manager(object):
             return
         if self._is_filter():
             self.normal()
-        if isinstance(self.right_panel, FilePanel):
-            self.right_panel.close()
-            self.right_panel = DirPanel(self._curpath(), 2)
+        self._cancel_preview()
+        self._use_right(self.dir_preview)
         self._copy_panel(self.middle_panel, self.right_panel)
         self._copy_panel(self.left_panel, self.middle_panel)
+        self._right_path = self._curpath()
         self.left_panel.backward()
         logger.info("change cwd to {}".format(self._curpath()))
 
@@ -245,6 +312,7 @@ class Manager(object):
     def forward(self):
         if self._is_select():
             return
+        self._flush_preview()
         if isinstance(self.right_panel, FilePanel):
             if not lfopt.auto_edit:
                 self._open(lfopt.auto_edit_cmd)
@@ -305,31 +373,40 @@ class Manager(object):
         self._delete(is_all=True)
 
     def _delete(self, is_all):
+        """
+        remove the lines at once and delete the paths in a worker thread,
+        in trash mode the paths are first renamed into the trash directory
+        """
         if self.empty():
             return
-        path = self._get_path_list(is_all)
-        if path == []:  # do nothing
+        path_list = self._get_path_list(is_all)
+        if path_list == []:  # do nothing
             return
         logger.info("START deletion")
-        self.msg_panel = MsgRemovePanel(self._get_path_list(is_all))
+        self.msg_panel = MsgRemovePanel(path_list)
         self.msg_panel.action()
         if not self.msg_panel.do:
             logger.info("action cancels")
             return
-        for path in self._get_path_list(is_all):
-            file_or_dir = 'file' if path.is_file() else 'directory'
-            logger.info("delete {} {}".format(file_or_dir, path))
-            try:
-                if path.is_file():
-                    path.unlink()
-                elif path.is_dir():
-                    shutil.rmtree(path)
-                logger.info("deletion success")
-            except FileNotFoundError:
-                logger.error("deletion failed")
-                print("File not find")
-        self.middle_panel.refresh(keep_pos=False)
         self.normal()
+        removed, to_remove = [], []
+        for path in path_list:
+            try:
+                trashed = move_to_trash(path, lfopt.trash_path) if lfopt.trash else None
+            except OSError as e:
+                logger.error(e)
+                vimsg("ErrorMsg", "deletion failed: {}".format(e))
+                continue
+            logger.info("delete {}{}".format(path, '' if trashed is None else " by trash"))
+            removed.append(path)
+            to_remove.append(path if trashed is None else trashed)
+            listing_cache.invalidate(path)
+            listing_cache.invalidate(path.parent)
+        # paths of a recursive listing or search may be in subdirectories
+        cwd = self.middle_panel.cwd
+        self.middle_panel.apply_changes({path.name: None for path in removed if path.parent == cwd})
+        if to_remove:
+            self._run_job(Remove(to_remove))
         logger.info("END deletion")
 
     @update_all
@@ -343,10 +420,119 @@ class Manager(object):
             return
         target = self.middle_panel.cwd / self.cli_panel.cmd
         self._curpath().rename(target)
+        listing_cache.invalidate(self.middle_panel.cwd)
+        listing_cache.invalidate(target.parent)
         self.middle_panel.refresh(item=target)
 
+    @update_all
+    def sort(self):
+        """
+        sort the middle directory by the order of the first letter typed,
+        an upper case letter reverses the order
+        """
+        if self._is_select() or self._is_filter():
+            self.normal()
+        self.cli_panel = CliPanel("Sort by (n)ame (v)ersion (s)ize (m)time (e)xt: ")
+        self.cli_panel.input()
+        if not self.cli_panel.do or self.cli_panel.cmd == '':
+            logger.info("action cancels")
+            return
+        letter = self.cli_panel.cmd[0]
+        orders = {'n': 'name', 'v': 'natural', 's': 'size', 'm': 'mtime', 'e': 'ext'}
+        order = orders.get(letter.lower())
+        if order is None:
+            vimsg("WarningMsg", "unknown sort order {}".format(letter))
+            return
+        logger.info("sort {} by {}".format(self.middle_panel.cwd, order))
+        self.middle_panel.sort(order, letter.isupper())
+
+    @update_info
     def copy(self):
-        pass
+        self._set_clipboard(is_cut=False)
+
+    @update_info
+    def cut(self):
+        self._set_clipboard(is_cut=True)
+
+    def _set_clipboard(self, is_cut):
+        if self.empty():
+            return
+        self.clipboard = self._get_path_list()
+        self.clipboard_cut = is_cut
+        logger.info("{} {} paths".format("cut" if is_cut else "copy", len(self.clipboard)))
+        self.normal()
+
+    @update_info
+    def paste(self):
+        """
+        copy or move the paths in clipboard to the middle directory in a
+        worker thread
+        """
+        if self.clipboard == [] or self.middle_panel.cwd is None:
+            return
+        if self._is_select():
+            self.normal()
+        self._run_job(Transfer(self.clipboard, self.middle_panel.cwd,
+                               self.clipboard_cut, lfopt.transfer_workers))
+        if self.clipboard_cut:
+            self.clipboard = []
+
+    def _purge_trash(self):
+        """
+        delete what is left in the trash by an unfinished deletion
+        """
+        left = list(lfopt.trash_path.iterdir())
+        if left:
+            self._run_job(Remove(left))
+
+    def _run_job(self, job):
+        """
+        start job, or queue it after the running one
+        """
+        if self.job is not None:
+            logger.info("queue {} after {}".format(job.verb, self.job.verb))
+            self._pending_jobs.append(job)
+            return
+        self.job = job
+        job.start()
+        self._job_timer = vimeval("timer_start({}, 'lf#job_poll', #{{repeat: -1}})"
+                .format(lfopt.job_interval))
+
+    @update_info
+    def cancel_job(self):
+        if self.job is not None:
+            logger.info("cancel {}".format(self.job.verb))
+            self.job.cancel()
+
+    def job_poll(self):
+        """
+        callback of the job timer, it runs even if the manager is closed
+        """
+        job = self.job
+        if job is None:
+            return
+        if not job.is_alive():
+            vimcmd("call timer_stop({})".format(self._job_timer))
+            self.job = None
+            self._job_timer = None
+            self._job_done(job)
+            if self._pending_jobs:
+                self._run_job(self._pending_jobs.popleft())
+        if self._is_start:
+            self.info_panel.info_path()
+            vimcmd("redraw")
+
+    def _job_done(self, job):
+        for path in job.touched:
+            listing_cache.invalidate(path)
+        if job.errors:
+            vimsg("ErrorMsg", "{} failed: {}".format(job.verb, job.errors[0]))
+        if not self._is_start or not self._is_normal():
+            return
+        for panel in (self.left_panel, self.middle_panel):
+            if panel.cwd in job.touched:
+                panel.refresh()
+        self._schedule_right()
 
     def _restore_pos(self):
         vimcmd("call lf#restore_pos()")
@@ -387,16 +573,19 @@ class Manager(object):
         self.normal()
 
     def _save_middle(self):
-        self.right_panel.set_exist()
-        self._close()
-        self._middle_backup = [self.middle_panel.index, self.middle_panel.text]
+        if isinstance(self.right_panel, FilePanel):
+            self.right_panel.set_exist()
+        self._cancel_preview()
+        for panel in self._panels():
+            panel.hide()
 
     def _open(self, cmd):
         logger.info("START opening with command `{}`".format(cmd))
         if self.is_keep_open:
             self._save_middle()
         is_open = False # whether the file is opened
-        for path in self._get_path_list():
+        for line in self._get_line_list():
+            path = line.path
             if not path.is_file():
                 logger.warning("ignore directory {}".format(path))
                 continue
@@ -404,7 +593,10 @@ class Manager(object):
             try:
                 vimcmd("{} {}".format(cmd, self._escape_path(path)))
                 is_open = True
-                self._restore_pos()
+                if line.lnum is None:
+                    self._restore_pos()
+                else:
+                    vimcmd("call cursor({}, {}) | norm! zz".format(line.lnum, line.col))
             except vim.error as e:
                 logger.error(e)
         if self.is_keep_open: # keep_open, restore the panel
@@ -442,18 +634,191 @@ class Manager(object):
     def regex_search(self):
         if self._is_select():
             self.normal()
+        self._stop_grep()
         self.search_panel = RegexSearchPanel(self)
         self.search_panel.input()
 
     def regex_search_all(self):
-        self.middle_panel.glob_all()
+        if self._is_select():
+            self.normal()
+        self._start_scan()
         self.regex_search()
+        self._stop_scan()
 
-    def _filter(self, mode):
+    def fuzzy_search(self):
+        if self._is_select():
+            self.normal()
+        self._start_scan()
+        self._stop_grep()
+        self.search_panel = FuzzySearchPanel(self)
+        self.search_panel.input()
+        self._stop_scan()
+
+    def grep(self):
         if self._is_select():
             self.normal()
+        if self._is_filter():
+            self.normal()
+        self.cli_panel = CliPanel("Grep: ")
+        self.cli_panel.input()
+        if not self.cli_panel.do or self.cli_panel.cmd == '':
+            return
+        self._stop_grep()
+        self.search_panel = GrepView(self, self.cli_panel.cmd)
         self.mode = "filter"
+        self.info_panel.info_path()
+
+    def grep_poll(self):
+        """
+        callback of the grep timer
+        """
+        if not self._is_start or not isinstance(self.search_panel, GrepView):
+            return
+        self.search_panel.poll()
+        self._schedule_right()
+        self.info_panel.info_path()
+        vimcmd("redraw")
+
+    def _stop_grep(self):
+        if isinstance(self.search_panel, GrepView):
+            self.search_panel.stop()
+
+    def _progress(self):
+        """
+        progress of the running file operation, scan or content search
+        """
+        progress = ''
+        if self.job is not None:
+            progress += self.job.progress()
+        if self.scanner is not None:
+            progress += " scanning {} ".format(self.scanner.count)
+        elif isinstance(self.search_panel, GrepView) and self.search_panel.is_running():
+            progress += self.search_panel.progress()
+        return progress
+
+    def _start_scan(self):
+        """
+        scan the middle directory recursively, the entries are moved to the
+        middle panel by a repeating timer
+        """
+        self._stop_scan()
+        self.scanner = self.middle_panel.glob_all()
+        self._scan_timer = vimeval("timer_start({}, 'lf#scan_poll', #{{repeat: -1}})"
+                .format(lfopt.scan_interval))
+
+    def _stop_scan(self):
+        """
+        cancel the running scan, return whether there is one
+        """
+        if self.scanner is None:
+            return False
+        vimcmd("call timer_stop({})".format(self._scan_timer))
+        self.scanner.cancel()
+        self.scanner = None
+        self._scan_timer = None
+        return True
+
+    def scan_poll(self):
+        """
+        callback of the scan timer
+        """
+        scanner = self.scanner
+        if not self._is_start or scanner is None:
+            return
+        is_done = not scanner.is_alive()
+        entries, removed = scanner.take()
+        if removed:
+            self.middle_panel.remove_glob(set(removed))
+            self.search_panel.rebuild()
+        if entries:
+            lines = self.middle_panel.extend_glob(entries)
+            self.search_panel.extend(lines)
+        if is_done:
+            vimcmd("call timer_stop({})".format(self._scan_timer))
+            self.scanner = None
+            self._scan_timer = None
+        self.info_panel.info_path()
+        vimcmd("redraw")
+
+    def _start_watch(self):
+        """
+        watch the directories shown, changes are applied by a repeating
+        timer
+        """
+        if not lfopt.watch:
+            return
+        self.watcher = create_watcher()
+        self.watcher.watch(list(self._watched_panels()))
+        self._watch_changes = {}
+        self._watch_wait = 0
+        self._watch_timer = vimeval("timer_start({}, 'lf#watch_poll', #{{repeat: -1}})"
+                .format(lfopt.watch_interval))
+
+    def _stop_watch(self):
+        if self.watcher is None:
+            return
+        vimcmd("call timer_stop({})".format(self._watch_timer))
+        self.watcher.close()
+        self.watcher = None
+        self._watch_timer = None
+
+    def _watched_panels(self):
+        """
+        panels listing a directory, keyed by the directory
+        """
+        panels = [self.left_panel, self.middle_panel]
+        if self.right_panel is self.dir_preview and self._right_is_current():
+            panels.append(self.dir_preview)
+        watched = {}
+        for panel in panels:
+            if panel.cwd is not None:
+                watched.setdefault(str(panel.cwd), []).append(panel)
+        return watched
+
+    def watch_poll(self):
+        """
+        callback of the watch timer, a burst of changes is applied once after
+        a quiet tick, or after lfopt.watch_max_delay ms if it goes on
+        """
+        if not self._is_start or self.watcher is None:
+            return
+        watched = self._watched_panels()
+        self.watcher.watch(list(watched))
+        events = self.watcher.poll()
+        for path, names in events.items():
+            pending = self._watch_changes.get(path, set())
+            if names is None or pending is None:
+                self._watch_changes[path] = None
+            else:
+                self._watch_changes[path] = pending | names
+        if not self._watch_changes:
+            return
+        self._watch_wait += lfopt.watch_interval
+        if events and self._watch_wait < lfopt.watch_max_delay:
+            return
+        # the lines are filtered or being scanned in other modes
+        if not self._is_normal() or self.scanner is not None:
+            return
+        changes, self._watch_changes = self._watch_changes, {}
+        self._watch_wait = 0
+        patched = False
+        for path, names in changes.items():
+            for panel in watched.get(path, []):
+                if panel.patch(names):
+                    patched = True
+                    if panel is self.middle_panel:
+                        self._right_path = None
+        if patched:
+            self._schedule_right()
+            self.info_panel.info_path()
+            vimcmd("redraw")
+
+    def _filter(self, mode):
+        if self._is_select():
+            self.normal()
         getattr(self.middle_panel, "filter_{}".format(mode))()
+        # a filter toggled off may leave the whole listing
+        self.mode = "filter" if self.middle_panel.is_filtered() else "normal"
 
     @update_info
     def filter_dir(self):
@@ -483,8 +848,7 @@ class Manager(object):
     def toggle_hidden(self):
         self.left_panel.toggle_hidden()
         self.middle_panel.toggle_hidden()
-        if self._right_is_dir():
-            self.right_panel.toggle_hidden()
+        self.dir_preview.toggle_hidden()
 
     def skip(self):
         pass
@@ -492,13 +856,13 @@ class Manager(object):
     @update_info
     def _restore(self):
         logger.info("restore UI")
-        self.border_panel = BorderPanel()
-        self.left_panel._create_popup()
+        for panel in self._panels():
+            if panel is not self.file_preview:
+                panel.show()
         self.left_panel.refresh()
-        self.middle_panel._create_popup()
-        self.middle_panel.restore(self._middle_backup)
-        self._change_right(True)
-        self.info_panel = InfoPanel(self)
+        self.middle_panel._cursorline()
+        self.right_panel = self.dir_preview
+        self._change_right()
 
     def _right_is_dir(self):
         return isinstance(self.right_panel, DirPanel)
@@ -507,27 +871,92 @@ class Manager(object):
         return self.middle_panel.curpath()
 
     def _show_dir(self):
-        if self._curpath() is None:
+        curentry = self.middle_panel.curentry()
+        if curentry is None:
             return True
-        return self._curpath().is_dir()
+        return curentry.is_dir
 
-    def _change_right(self, init=False):
-        if not init:
-            self.right_panel.close()
+    def _change_right(self):
+        self._right_path = self._curpath()
         if self._show_dir():
-            self.right_panel = DirPanel(self._curpath(), 2)
-            if self._curpath() is not None:
-                self.right_panel.refresh(keep_pos=False)
+            self.dir_preview.set_cwd(self._curpath())
+            self._use_right(self.dir_preview)
         else:
-            self.right_panel = FilePanel(self._curpath())
+            self.file_preview.set_entry(self.middle_panel.curentry())
+            self._use_right(self.file_preview)
+
+    def _use_right(self, panel):
+        """
+        show panel of the preview pool as the right panel
+        """
+        if panel is self.right_panel:
+            return
+        self.right_panel.hide()
+        panel.show()
+        self.right_panel = panel
+
+    def _right_is_current(self):
+        return self._right_path == self._curpath()
+
+    def _schedule_right(self):
+        """
+        update right panel after lfopt.preview_delay ms, a pending update is
+        dropped when a newer one is scheduled
+        """
+        if lfopt.preview_delay <= 0:
+            self._change_right()
+            return
+        pending, self._preview_timer = self._preview_timer, None
+        self._preview_tick += 1
+        if self._right_is_current():
+            if pending is not None:
+                vimcmd("call timer_stop({})".format(pending))
+            return
+        start = "timer_start({}, function('lf#preview', [{}]))".format(
+                lfopt.preview_delay, self._preview_tick)
+        if pending is not None:
+            # stop the pending update in the same call
+            start = "[timer_stop({}), {}][1]".format(pending, start)
+        self._preview_timer = vimeval(start)
+
+    def _cancel_preview(self):
+        if self._preview_timer is not None:
+            vimcmd("call timer_stop({})".format(self._preview_timer))
+            self._preview_timer = None
+        self._preview_tick += 1
+
+    def _flush_preview(self):
+        """
+        run the pending right panel update at once
+        """
+        if self._preview_timer is not None:
+            self._cancel_preview()
+            self._change_right()
+
+    def preview(self, tick):
+        """
+        callback of the preview timer
+        """
+        if not self._is_start or tick != self._preview_tick:
+            logger.info("drop stale preview {}".format(tick))
+            return
+        self._preview_timer = None
+        self._change_right()
+        self.info_panel.info_path()
+        vimcmd("redraw")
+
+    def _panels(self):
+        return [self.border_panel, self.info_panel, self.left_panel,
+                self.middle_panel, self.dir_preview, self.file_preview]
 
     def _close(self):
         logger.info("close panels")
-        self.border_panel.close()
-        self.info_panel.close()
-        self.left_panel.close()
-        self.middle_panel.close()
-        self.right_panel.close()
+        self._cancel_preview()
+        self._stop_scan()
+        self._stop_grep()
+        self._stop_watch()
+        for panel in self._panels():
+            panel.close()
 
     def _copy_panel(self, a: DirPanel, b: DirPanel):
         """
@@ -535,11 +964,11 @@ class Manager(object):
         """
         b.cwd = a.cwd
         b.index = a.index
-        b.path_list = a.path_list
+        b.entry_list = a.entry_list
         b.text = a.text
         b.refresh()
 
 
 vlf_manager = Manager()
 
-__all__ = ['vlf_manager']
+__all__ = ['vlf_manager', 'vlf_profiler']
@@ -1,3 +1,4 @@
+import os
 from copy import copy
 from pathlib import Path
 from datetime import date
@@ -14,6 +15,8 @@ class FixedOption(object):
         self.auto_edit_cmd = vimget('auto_edit_cmd', "'edit'")
         self.sort_dir_first = vimget('sort_dir_first', 1) == '1'
         self.sort_ignorecase = vimget('sort_ignorecase', 1) == '1'
+        self.sort_order = vimget('sort_order', "'name'")
+        self.sort_reverse = vimget('sort_reverse', 0) == '1'
         self.file_numbered = vimget('file_numbered', 0) == '1'
         self.auto_keep_open = vimget('auto_keep_open', 0) == '1'
         self.mode_normal = vimget('mode_normal', "'NORMAL'")
@@ -21,6 +24,32 @@ class FixedOption(object):
         self.mode_filter = vimget('mode_filter', "'FILTER'")
         self.mode_keep_open = vimget('mode_keep_open', "'KEEP'")
         self.max_regex_search_history = vimget('max_regex_search_history', 50, 1)
+        self.listing_cache_size = vimget('listing_cache_size', 64, 1)
+        self.render_threshold = vimget('render_threshold', 1000, 1)
+        self.render_margin = vimget('render_margin', 100, 1)
+        self.preview_delay = vimget('preview_delay', 50, 1)
+        self.has_popup_setbuf = vimeval("exists('*popup_setbuf')") == '1'
+        self.preview_mode = vimget('preview_mode', "'head'")
+        self.preview_bytes = vimget('preview_bytes', 16384, 1)
+        self.preview_syntax = vimget('preview_syntax', 1) == '1'
+        self.search_backend = vimget('search_backend', "'python'")
+        self.fuzzy_limit = vimget('fuzzy_limit', 100, 1)
+        self.scan_interval = vimget('scan_interval', 100, 1)
+        self.scan_max_depth = vimget('scan_max_depth', 0, 1)
+        self.scan_max_entries = vimget('scan_max_entries', 500000, 1)
+        self.ignore = vimget('ignore', "['.git/', '.hg/', '.svn/', 'node_modules/', '__pycache__/', '.venv/']")
+        self.respect_ignore_files = vimget('respect_ignore_files', 1) == '1'
+        self.use_index = vimget('use_index', 0) == '1'
+        self.grep_workers = vimget('grep_workers', 0, 1) or os.cpu_count() or 1
+        self.grep_max_size = vimget('grep_max_size', 4, 1) * 1048576
+        self.grep_max_hits = vimget('grep_max_hits', 10000, 1)
+        self.watch = vimget('watch', 1) == '1'
+        self.watch_interval = vimget('watch_interval', 200, 1)
+        self.watch_max_delay = vimget('watch_max_delay', 1000, 1)
+        self.transfer_workers = vimget('transfer_workers', 4, 1)
+        self.job_interval = vimget('job_interval', 200, 1)
+        self.trash = vimget('trash', 0) == '1'
+        self.profile = vimget('profile', 0) == '1'
         self._set_path()
 
     def _set_path(self):
@@ -31,6 +60,11 @@ class FixedOption(object):
         self.history_path = self.cache_path / 'history'
         self._mkdir(self.history_path)
         self.regex_search_history = self.history_path / 'regex_search_history.p'
+        self.index_path = self.cache_path / 'index'
+        self._mkdir(self.index_path)
+        self.trash_path = self.cache_path / 'trash'
+        self._mkdir(self.trash_path)
+        self.profile_path = self.cache_path / 'profile'
 
     def _set_log(self):
         self.log_dir = self.cache_path / 'log'
@@ -1,10 +1,21 @@
+import os
 import logging
+import vim
 from copy import copy
 from operator import attrgetter
 from .utils import *
-from .text import Text, SimpleLine
+from .width import dplen, bytelen
+from .text import Text, Line, SimpleLine, GrepLine, COLUMNS, relative_start, path_rows
+from .sort import STAT_ORDERS, get_state, set_state, sort_lines
 from .option import lfopt, PopupOption
 from .search import RegexSearch
+from .fuzzy import FuzzySearch
+from .scan import Entry, scandir, Scanner
+from .ignore import Ignore
+from .index import get_index
+from .grep import Grep, compile_grep
+from .cache import listing_cache
+from .preview import HeadPreview
 
 
 logger = logging.getLogger()
@@ -26,6 +37,12 @@ class Panel(object):
     def close(self):
         vimcmd("call popup_close({})".format(self.winid))
 
+    def hide(self):
+        vimcmd("call popup_hide({})".format(self.winid))
+
+    def show(self):
+        vimcmd("call popup_show({})".format(self.winid))
+
     def _set_wincolor(self):
         setlocal(self.winid, "wincolor={}".format(self.ppopt.wincolor))
 
@@ -37,15 +54,20 @@ class Panel(object):
 
 
 class Select(object):
+    """
+    visual selection of the lines between start and end, the selected rows
+    are highlighted by a single match of a line range so that the cost of a
+    move does not depend on the size of the selection
+    """
     def __init__(self, panel):
         self.panel = panel
-        self.path_list = panel.get_path_list()
-        self.max_len = len(self.path_list)
+        self.max_len = len(panel.text)
         self.start = panel.index
         self.end = panel.index
         self.scroll_line = panel.scroll_line
         self.id_list = []
         self.is_add = True
+        self._match_clear()
         self._update()
         logger.info("record pos: [{}, {}]".format(self.start, self.end))
 
@@ -56,21 +78,24 @@ class Select(object):
         return range(min(self.start, self.end), max(self.start, self.end) + 1)
 
     def selection(self):
+        return [line.path for line in self.selected_lines()]
+
+    def selected_lines(self):
         a, b = min(self.start, self.end), max(self.start, self.end) + 1
-        return self.path_list[a:b]
+        return self.panel.text[a:b]
 
     def _update(self):
         self.panel.index = self.end
-        #  self.panel.refresh(keep_pos=False)
-        self._match_clear()
-        for index in self._range():
-            vimcmd(
-                "call matchaddpos('vlf_hl_cursorline_v', [%s], 100, -1, #{window: %s})"
-                % (index + 1, self._winid()))
-        vimcmd(
-            "call matchaddpos('vlf_hl_cursorline_1', [%s], 200, -1, #{window: %s})"
-            % (self.end + 1, self._winid()))
-        vimcmd('call win_execute({}, "norm! {}zz", 1)'.format(self._winid(), self.end + 1))
+        self.panel._ensure_rendered(self.end)
+        rows = self._range()
+        # popup lines strictly between first - 1 and last + 1
+        first = max(self.panel._row(rows.start), 1)
+        last = self.panel._row(rows.stop - 1)
+        pattern = r'\%>{}l\%<{}l.*'.format(first - 1, last + 1)
+        row = self.panel._row(self.end)
+        matches = [['vlf_hl_cursorline_v', pattern, 100], ['vlf_hl_cursorline_1', row, 200]]
+        self.id_list = [int(i) for i in vimeval("lf#highlight({}, {}, {}, {})".format(
+            self._winid(), self.id_list, vimstr(matches), row))]
 
     def _match_clear(self):
         vimcmd("call clearmatches({})".format(self._winid()))
@@ -126,16 +151,21 @@ class DirPanel(Panel):
         self.number = number
         self._set_attr()
         self.index = 0
+        self.render_start = 0
+        self.render_end = 0
         self.cursorline_id = None
+        self._model = None  # Text of the listing
+        self._view_text = None  # lines of the listing left by the filters
+        self.filters = []  # (column name, value) of the filters of the listing
         self.text = []
-        self.path_list = []
+        self.entry_list = []
         self.ppopt = PopupOption()
         self.show_hidden = lfopt.show_hidden
         self._create_popup()
         self.mode = "normal"
         self.winwidth = vimeval("winwidth({})".format(self.winid), 1)
-        winheight = vimeval("winheight({})".format(self.winid), 1)
-        self.scroll_line = winheight // 2
+        self.winheight = vimeval("winheight({})".format(self.winid), 1)
+        self.scroll_line = self.winheight // 2
 
     def _set_attr(self):
         name_list = ["left", "middle", "right"]
@@ -161,48 +191,177 @@ class DirPanel(Panel):
     def _is_select(self):
         return self.mode == "select"
 
-    def restore(self, backup):
-        self.index, self.text = backup
-        self.path_list = self.get_path_list()
-        self._set_text()
-        self._cursorline()
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, lines):
+        self._text = lines
+        self._rows = None
+        self.search_pos = None  # matched (col, length) of each line of a search
 
     def get_path_list(self):
         return [line.path for line in self.text]
 
     def _glob(self):
-        self.path_list = self.cwd.glob('*')
-        self._set_text()
+        state = get_state(self.cwd)
+        # sizes and mtimes to sort by are not taken from the cache
+        revalidate = Text.restat if state[0] in STAT_ORDERS else None
+        T = listing_cache.get(self, self._scan, revalidate)
+        T.sort(state)
+        # the entries of a cached listing are not scanned again
+        self.entry_list = T.entry_list
+        self._set_text(T)
+
+    def sort(self, order, reverse):
+        """
+        sort the listing by order, the cached lines are sorted again in
+        place without globbing
+        """
+        if self.cwd is None:
+            return
+        set_state(self.cwd, order, reverse)
+        self.refresh()
+
+    def _scan(self):
+        self.entry_list = scandir(self.cwd)
+        return Text(self)
 
     def glob_all(self):
+        """
+        start a recursive scan of cwd in a worker thread, the entries found
+        are added by extend_glob
+        """
         self.index = 0
-        self.path_list = self.cwd.rglob('*')
-        self._set_text()
+        self.entry_list = []
+        self.text = self.glob_text = []
+        self._render(self.index)
         self._cursorline()
+        root, index = self.cwd, None
+        if lfopt.use_index:
+            root = find_root(self.cwd) or self.cwd
+            index = get_index(root, lfopt.index_path)
+        ignore = Ignore.for_root(root, lfopt.ignore, lfopt.respect_ignore_files)
+        scanner = Scanner(self.cwd, lfopt.scan_max_depth, lfopt.scan_max_entries, ignore, index)
+        scanner.start()
+        return scanner
+
+    def append_lines(self, lines):
+        """
+        append lines to the end, the popup is rendered again only if the
+        rendered range is not full
+        """
+        self.text.extend(lines)
+        self._rows = None
+        if self.render_end - self.render_start < self.winheight + 2 * lfopt.render_margin:
+            self._render(self.index)
+            self._cursorline()
+
+    def extend_glob(self, entries):
+        """
+        append lines of scanned entries, return the new lines
+        """
+        self.entry_list.extend(entries)
+        lines = Text(self, entries).text
+        self.glob_text.extend(lines)
+        if self.text is self.glob_text:
+            self._rows = None
+            self._render(self.index)
+            self._cursorline()
+        return lines
+
+    def remove_glob(self, paths):
+        """
+        remove the lines of paths found outdated by the scan
+        """
+        self.entry_list = [e for e in self.entry_list if e.path_str not in paths]
+        # in place, the searches hold the list
+        self.glob_text[:] = [line for line in self.glob_text if line.entry.path_str not in paths]
+        if self.text is self.glob_text:
+            self._rows = None
+            self._correct_index()
+            self._render(self.index)
+            self._cursorline()
 
     def _set_text(self, T=None):
         if T is None:
             T = Text(self)
-        self.text = T.text
-        props = [' ' * self.winwidth] if self.empty() else T.props
-        vimcmd("call popup_settext({}, {})".format(self.winid, vimstr(props)))
+        self._model = T
+        self.filters = []
+        self.text = self._view_text = T.text
+        self._render(self.index)
+
+    def _render(self, center):
+        """
+        send the lines around model index center to the popup, all lines are
+        sent if there are no more than lfopt.render_threshold of them
+        """
+        total = self._len()
+        if total <= lfopt.render_threshold:
+            start, end = 0, total
+        else:
+            half = self.winheight // 2 + lfopt.render_margin
+            start = max(0, min(center - half, total - 2 * half))
+            end = min(total, start + 2 * half)
+        self.render_start, self.render_end = start, end
+        if self.empty():
+            props = [' ' * self.winwidth]
+        else:
+            props = [line.render(self.winwidth) for line in self.text[start:end]]
+        # matches of rows are stale once the lines change
+        cmd = "call popup_settext({0}, {1}) | call clearmatches({0})".format(
+            self.winid, vimstr(props))
+        pos = self._search_pos(start, end)
+        if pos:
+            cmd += " | call lf#matchaddpos({}, 'vlf_hl_search', {}, 200)".format(self.winid, pos)
+        vimcmd(cmd)
+        self.cursorline_id = None
+
+    def _search_pos(self, start, end):
+        """
+        positions of the search matches of lines start to end as rows of the
+        popup
+        """
+        if self.search_pos is None:
+            return []
+        pos = []
+        for row, positions in enumerate(self.search_pos[start:end], 1):
+            pos.extend([row, col, length] for col, length in positions)
+        return pos
+
+    def _ensure_rendered(self, index):
+        """
+        make sure the window centered at model index is rendered, return True
+        if the popup is re-rendered
+        """
+        half = self.winheight // 2 + 1
+        if (index - half < self.render_start and self.render_start > 0) \
+                or (index + half >= self.render_end and self.render_end < self._len()):
+            self._render(index)
+            return True
+        return False
+
+    def _row(self, index):
+        """
+        line number in popup of model index
+        """
+        return index - self.render_start + 1
 
     def _cursorline(self):
         """
-        highlight curcorline
+        highlight curcorline and scroll it to the middle in one vim call, the
+        highlight of the previous line is deleted by its id
         """
-        if self.cursorline_id is not None:
-            self._match_clear()
-            self.cursorline_id = None
         if self.empty() and self.is_middle:
-            self.cursorline_id = vimeval(
-                    "matchaddpos('vlf_hl_cursorline_%d', [%s], 100, -1, #{window: %s})"
-                    % (self.number, 1, self.winid))
-            return
-        self.cursorline_id = vimeval(
-                "matchaddpos('vlf_hl_cursorline_%d', [%s], 100, -1, #{window: %s})"
-                % (self.number, self.index + 1, self.winid))
-        vimcmd('call win_execute({}, "norm! {}zz", 1)'.format(self.winid, self.index + 1))
+            row, scroll = 1, 0
+        else:
+            self._ensure_rendered(self.index)
+            row = scroll = self._row(self.index)
+        ids = [] if self.cursorline_id is None else [self.cursorline_id]
+        matches = [['vlf_hl_cursorline_%d' % self.number, row, 100]]
+        self.cursorline_id = int(vimeval("lf#highlight({}, {}, {}, {})".format(
+            self.winid, ids, vimstr(matches), scroll))[0])
 
     def _match_clear(self):
         vimcmd("call clearmatches({})".format(self.winid))
@@ -225,19 +384,45 @@ class DirPanel(Panel):
     def empty(self):
         return self.text == []
 
+    def _find(self, path):
+        """
+        model index of path or None, the index of paths is kept by the Text
+        of the listing, which is cached with it, else built once per change
+        of the lines
+        """
+        if self._model is not None and self.text is self._model.text:
+            rows = self._model.rows()
+        else:
+            if self._rows is None:
+                self._rows = path_rows(self.text)
+            rows = self._rows
+        return rows.get(str(path))
+
     def _index(self, item):
-        find = False
-        for i, line in enumerate(self.text):
-            if line.path == item:
-                self.index = i
-                find = True
-                break
-        if not find:
-            self.index = 0
+        index = None if item is None else self._find(item)
+        self.index = 0 if index is None else index
+
+    def set_cwd(self, cwd):
+        """
+        show directory cwd in the panel, clear the panel if cwd is None
+        """
+        self.cwd = cwd.resolve() if cwd is not None else None
+        self.index = 0
+        if self.cwd is not None:
+            self.refresh(keep_pos=False)
+            return
+        self.text = []
+        self.entry_list = []
+        self._render(0)
+        self._match_clear()
+        self.cursorline_id = None
 
     def curpath(self):
         return None if self.empty() else self.text[self.index].path
 
+    def curentry(self):
+        return None if self.empty() else self.text[self.index].entry
+
     def refresh(self, keep_pos=True, item=None, index=None):
         if index is not None:
             self._glob()
@@ -257,51 +442,169 @@ class DirPanel(Panel):
         if self.is_middle:
             logger.info("cursor pos after refresh: {}".format(self.index))
 
-    def _search_refresh(self, Text):
-        self.text = Text.text
+    def _changed_entries(self, names):
+        """
+        new entry of each changed name, None if removed, names None means
+        the changes are found by comparing the listing
+        """
+        if names is not None:
+            changed = {}
+            for name in names:
+                path = self.cwd / name
+                changed[name] = Entry.from_path(path) if os.path.lexists(path) else None
+            return changed
+        old = {e.name: e for e in self.entry_list}
+        new = {e.name: e for e in scandir(self.cwd)}
+        changed = {name: None for name in old.keys() - new.keys()}
+        for name, e in new.items():
+            o = old.get(name)
+            if o is None or (o.is_dir, o.size, o.mtime) != (e.is_dir, e.size, e.mtime):
+                changed[name] = e
+        return changed
+
+    def patch(self, names=None):
+        """
+        insert, replace or remove the lines of changed names instead of
+        globbing the directory again, return whether the panel changed
+        """
+        if self.cwd is None:
+            return False
+        return self.apply_changes(self._changed_entries(names))
+
+    def apply_changes(self, changed):
+        """
+        set the lines of the names in changed to their new entry, lines of
+        names mapped to None are removed
+        """
+        if not changed:
+            return False
+        entry = self.curentry()
+        view = self.shows_view()
+        # by full path, as lines of a search may be in subdirectories
+        paths = {str(self.cwd / name) for name in changed}
+        self.entry_list = [e for e in self.entry_list if e.path_str not in paths]
+        lines = self._model.text if view else self.text
+        lines = [line for line in lines if line.entry.path_str not in paths]
+        start = relative_start(self.cwd)
+        for new in changed.values():
+            if new is None:
+                continue
+            self.entry_list.append(new)
+            line = Line(new, start)
+            if line.is_hidden and not self.show_hidden:
+                continue
+            lines.append(line)
+        # the list is almost sorted, which is fast to sort again
+        if view:
+            # the patched listing is a new Text, the cached one is left as is
+            self._model = Text(self, self.entry_list, lines)
+            self._set_view()
+        else:
+            sort_lines(lines, get_state(self.cwd))
+            self.text = lines
+        logger.info("patch {} lines of {}".format(len(changed), self.cwd))
+        if entry is not None and changed.get(entry.name, entry) is not None:
+            self._index(entry.path)
+        else:
+            self._correct_index()
+        self._render(self.index)
+        self._cursorline()
+        return True
+
+    def _search_refresh(self, lines, pos_list):
+        """
+        show the results of a search, the matches are highlighted whenever
+        the lines are rendered
+        """
+        self.text = lines
+        self.search_pos = pos_list
         self.index = 0
-        props = [' ' * self.winwidth] if self.empty() else Text.props
-        vimcmd("call popup_settext({}, {})".format(self.winid, props))
-        self._match_clear()
+        self._render(self.index)
 
-    def regex_refresh(self, Text, pos_list):
-        self._search_refresh(Text)
-        pos = 0
-        for col, length in pos_list:
-            pos += 1
-            vimcmd(
-                    "call matchaddpos('vlf_hl_search', [%s], 200, -1, #{window: %s})"
-                    % ([pos, col, length], self.winid))
+    def regex_refresh(self, lines, pos_list):
+        self._search_refresh(lines, [[pos] for pos in pos_list])
 
-    def filter_dir(self):
-        curpath = self.curpath()
-        if curpath is None or not curpath.is_dir():
+    def fuzzy_refresh(self, lines, pos_list):
+        self._search_refresh(lines, pos_list)
+
+    def shows_view(self):
+        """
+        whether the lines shown are the listing left by the filters
+        """
+        return self._model is not None and self.text is self._view_text
+
+    def is_filtered(self):
+        return not self.shows_view() or self.filters != []
+
+    def _set_view(self):
+        """
+        show the lines of the listing left by the filters
+        """
+        lines = self._model.text
+        if self.filters:
+            lines = [lines[i] for i in self._model.select(self.filters)]
+        self.text = self._view_text = lines
+
+    def _filter(self, name, accept):
+        """
+        toggle the filter of the listing by the value of column name at the
+        cursor, filters of other columns are kept, so that they compose. the
+        lines left are picked from the sorted listing by its cached columns,
+        lines of a search are filtered as they are
+        """
+        entry = self.curentry()
+        if entry is None:
             return
-        self.path_list = [line.path for line in self.text if line.path.is_dir()]
-        T = Text(self)
-        self._set_text(T)
-        self._index(item=curpath)
+        if not self.shows_view():
+            if not accept(entry):
+                return
+            column = COLUMNS[name]
+            value = column(entry)
+            self.text = [line for line in self.text if column(line.entry) == value]
+        else:
+            filters = [f for f in self.filters if f[0] != name]
+            if len(filters) == len(self.filters):
+                if not accept(entry):
+                    return
+                filters.append((name, COLUMNS[name](entry)))
+            self.filters = filters
+            self._set_view()
+        logger.info("filter by {} to {} lines".format(name, self._len()))
+        self._index(entry.path)
+        self._render(self.index)
         self._cursorline()
 
+    def filter_dir(self):
+        self._filter('dir', attrgetter('is_dir'))
+
     def filter_file(self):
-        curpath = self.curpath()
-        if curpath is None or not curpath.is_file():
-            return
-        self.path_list = [line.path for line in self.text if line.path.is_file()]
-        T = Text(self)
-        self._set_text(T)
-        self._index(item=curpath)
-        self._cursorline()
+        self._filter('file', attrgetter('is_file'))
 
     def filter_ext(self):
-        curpath = self.curpath()
-        if curpath is None or not curpath.is_file():
-            return
-        ext = curpath.suffix
-        self.path_list = [line.path for line in self.text if line.path.suffix == ext]
-        T = Text(self)
-        self._set_text(T)
-        self._index(item=curpath)
+        self._filter('ext', attrgetter('is_file'))
+
+    def unfilter(self, item):
+        """
+        show the whole listing with item at the cursor, return False if no
+        filter is set
+        """
+        if not self.filters:
+            return False
+        self.filters = []
+        self._set_view()
+        self._index(item)
+        self._render(self.index)
+        self._cursorline()
+        return True
+
+    def show_view(self, index):
+        """
+        show the listing left by the filters again, after a search of it
+        """
+        self.text = self._view_text
+        self.index = index
+        self._correct_index()
+        self._render(self.index)
         self._cursorline()
 
     def backward(self):
@@ -321,9 +624,9 @@ class DirPanel(Panel):
         if self.empty():
             logger.warning("ignore empty directory {}".format(self.cwd))
             return
-        curpath = self.curpath()
-        if curpath.is_dir():
-            self.cwd = curpath
+        curentry = self.curentry()
+        if curentry.is_dir:
+            self.cwd = curentry.path
         logger.info("cursor pos after forward: {}".format(self.index))
         logger.info("current path is {}".format(self.curpath()))
 
@@ -363,12 +666,14 @@ class DirPanel(Panel):
 
     def toggle_hidden(self):
         self.show_hidden = not self.show_hidden
-        self.refresh()
+        if self.cwd is not None:
+            self.refresh()
 
     def touch(self, name: str):
         file = self.cwd / name
         logger.info("touch file {}".format(file))
         file.touch()
+        listing_cache.invalidate(self.cwd)
         self.refresh()
 
 
@@ -379,22 +684,81 @@ class HistoryPanel(Panel):
 
 
 class FilePanel(Panel):
-    def __init__(self, path):
+    """
+    file preview, the popup is reused and retargeted by set_path()
+    """
+    def __init__(self):
         self.ppopt = PopupOption()
-        self.path = path.resolve(True)
-        self._create()
+        self.path = None
+        self.stat = None  # (path, mtime, size) of the file shown
+        self.lines = 0
+        self.buf_exist = True  # scratch buffer of the popup
+        self.winid = vimeval("popup_create([], {})".format(self.ppopt.popup("right")))
+        self.bufnr = vimeval("winbufnr({})".format(self.winid))
+        self.winheight = vimeval("winheight({})".format(self.winid), 1)
+        if lfopt.file_numbered:
+            setlocal(self.winid, "number")
+        self._set_wincolor()
+
+    def set_entry(self, entry):
+        """
+        preview the file of entry, the file shown is read again only if it
+        changed since
+        """
+        path = entry.path.resolve(True)
+        st = path.stat()
+        stat = (path, st.st_mtime_ns, st.st_size)
+        if stat == self.stat:
+            return
+        self.stat = stat
+        if lfopt.preview_mode == 'head':
+            self.path = path
+            self._preview_head(st.st_size)
+            return
+        if path == self.path:
+            # bufload() does not read a loaded buffer again, a buffer of the
+            # user is left as it is
+            if not self.buf_exist:
+                vimcmd("call setbufvar({0}, '&autoread', 1) | silent checktime {0}".format(self.bufnr))
+                self._linenr()
+            return
+        bufnr, buf_exist = self.bufnr, self.buf_exist
+        self.path = path
+        self._retarget()
         self._linenr()
         self._set_option()
+        if not buf_exist and bufnr != self.bufnr:
+            vimcmd("bwipeout {}".format(bufnr))
 
-    def _create(self):
-        opt = self.ppopt.popup("right")
+    def _preview_head(self, size):
+        """
+        show the head of file in the scratch buffer of the popup
+        """
+        head = HeadPreview(self.path, size, lfopt.preview_bytes, self.winheight)
+        self.lines = head.linenr()
+        vim.vars['vlf_preview_text'] = head.lines
+        vimcmd("call popup_settext({}, g:vlf_preview_text)".format(self.winid))
+        if not lfopt.preview_syntax:
+            return
+        if head.is_binary:
+            setlocal(self.winid, "filetype=")
+            return
+        path = str(self.path).replace("'", "''")
+        vimcmd("call win_execute({}, 'setlocal filetype= | doautocmd filetypedetect BufRead ' . fnameescape('{}'))"
+                .format(self.winid, path))
+
+    def _retarget(self):
         self.buf_exist = vimeval("bufexists('{}') == v:true".format(self.path)) == '1'
-        if self.buf_exist:
-            vimcmd("noautocmd silent let winid = bufnr('{}')->popup_create({})".format(self.path, opt))
-            self.winid = vimeval("winid")
-        else:
-            vimcmd("noautocmd silent let winid = '{}'->bufadd()->popup_create({})".format(self.path, opt))
-            self.winid = vimeval("winid")
+        vimcmd("noautocmd silent let bufnr = bufadd('{}')".format(self.path))
+        if lfopt.has_popup_setbuf:
+            vimcmd("noautocmd silent call bufload(bufnr)")
+            vimcmd("noautocmd silent call popup_setbuf({}, bufnr)".format(self.winid))
+            return
+        # without popup_setbuf() the popup has to be created again
+        opt = self.ppopt.popup("right")
+        vimcmd("call popup_close({})".format(self.winid))
+        vimcmd("noautocmd silent let winid = popup_create(bufnr, {})".format(opt))
+        self.winid = vimeval("winid")
 
     def _linenr(self):
         winexec(self.winid, "let _lines = line('$')")
@@ -506,23 +870,13 @@ class InfoPanel(BaseShowPanel):
         self.mode = " {} ".format(getattr(lfopt, "mode_{}".format(self._mode())))
 
     def _set_sz(self):
-        self.sz = ''
+        self.sz = self.manager._progress()
         if self._empty():
             return
-        if self.path.is_file():
-            sz = self.path.stat().st_size
-            if sz < 2 ** 10:
-                unit = 'B'
-            elif sz < 2 ** 20:
-                unit = 'KB'
-                sz >>= 10
-            elif sz < 2 ** 30:
-                unit = 'MB'
-                sz >>= 20
-            else:
-                unit = 'GB'
-                sz >>= 30
-            self.sz = " {} {} ".format(sz, unit)
+        entry = self.manager.middle_panel.curentry()
+        if entry.is_file:
+            entry.restat()  # the entry may come from a cached listing
+            self.sz += " {} ".format(human_size(entry.size))
 
     def _set_nr(self):
         if self._empty():
@@ -530,7 +884,9 @@ class InfoPanel(BaseShowPanel):
             return
         lines = 0
         right = self.manager.right_panel
-        if isinstance(right, DirPanel):
+        if not self.manager._right_is_current():
+            lines = '-'  # preview is pending
+        elif isinstance(right, DirPanel):
             lines = len(right.text)
         elif isinstance(right, FilePanel):
             lines = right.lines
@@ -654,29 +1010,63 @@ class CliPanel(BaseShowPanel):
 
 
 class RegexSearchPanel(CliPanel):
-    def __init__(self, manager):
-        super().__init__('/')
+    def __init__(self, manager, prompt='/'):
+        super().__init__(prompt)
         self.manager = manager
         self.middle = manager.middle_panel
         self.save_index = self.middle.index
-        self.regex_search = RegexSearch(self.middle.text, self)
+        # a search of filtered lines goes back to them
+        self.from_view = self.middle.shows_view() and self.middle.filters != []
+        self.searcher = self._create_searcher(self.middle.text)
         self.history_idx = -1
 
+    def _create_searcher(self, lines):
+        return RegexSearch(lines, self)
+
+    def _history(self):
+        return self.manager.regex_search_history
+
+    def _save(self):
+        self.manager.save_regex(self.cmd)
+
     def _refresh(self):
-        T, pos_list = self.regex_search.filter()
-        self.middle.regex_refresh(T, pos_list)
-        self.manager._change_right()
+        lines, pos_list = self.searcher.filter()
+        self.middle.regex_refresh(lines, pos_list)
+        self.manager._schedule_right()
 
     def restore(self):
-        self.middle.refresh(index=self.save_index)
+        if self.from_view:
+            self.middle.show_view(self.save_index)
+        else:
+            self.middle.refresh(index=self.save_index)
 
     def input(self):
         while 1:
+            self.keep_input = False
             action = vimeval("lf#search()")
-            if action in ['done', 'quit']:
+            if action in ['done', 'quit'] and not self.keep_input:
                 break
 
+    def extend(self, lines):
+        """
+        search lines found by a running scan
+        """
+        self.searcher.extend(lines)
+        self._refresh()
+
+    def rebuild(self):
+        """
+        search all lines again, after lines are removed by a running scan,
+        the lines shown are only the results
+        """
+        self.searcher = self._create_searcher(self.middle.glob_text)
+        self._refresh()
+
     def quit(self):
+        if self.manager._stop_scan():
+            self.keep_input = True  # the first quit only stops the scan
+            self.manager.info_panel.info_path()
+            return
         super().quit()
         self.restore()
 
@@ -687,7 +1077,7 @@ class RegexSearchPanel(CliPanel):
 
     def done(self):
         super().done()
-        self.manager.save_regex(self.cmd)
+        self._save()
         self.manager.mode = "filter"
         self.manager.info_panel.info_path()
         self.middle._cursorline()
@@ -699,23 +1089,19 @@ class RegexSearchPanel(CliPanel):
 
     def delete(self):
         super().delete()
-        self.restore()
-        if self.cmd != '':
-            self._refresh()
+        self._refresh()
         self.history_idx = -1
 
     def previous_search(self):
         logger.info("current history index is {}".format(self.history_idx))
         if self.history_idx == -1:
             self.save_cmd = copy(self.cmd)
-        if self.history_idx >= len(self.manager.regex_search_history) - 1:
+        if self.history_idx >= len(self._history()) - 1:
             return
         self.history_idx += 1
-        self.cmd = self.manager.regex_search_history[self.history_idx]
+        self.cmd = self._history()[self.history_idx]
         self.go_end()
-        self.restore()
-        if self.cmd != '':
-            self._refresh()
+        self._refresh()
 
     def next_search(self):
         logger.info("current history index is {}".format(self.history_idx))
@@ -725,11 +1111,80 @@ class RegexSearchPanel(CliPanel):
         if self.history_idx == -1:
             self.cmd = copy(self.save_cmd)
         else:
-            self.cmd = self.manager.regex_search_history[self.history_idx]
+            self.cmd = self._history()[self.history_idx]
         self.go_end()
-        self.restore()
-        if self.cmd != '':
-            self._refresh()
+        self._refresh()
+
+
+class FuzzySearchPanel(RegexSearchPanel):
+    """
+    rank lines by fuzzy match, only the best lfopt.fuzzy_limit lines are shown
+    """
+    def __init__(self, manager):
+        super().__init__(manager, '> ')
+
+    def _create_searcher(self, lines):
+        return FuzzySearch(lines, self, lfopt.fuzzy_limit)
+
+    def _history(self):
+        return self.manager.fuzzy_search_history
+
+    def _save(self):
+        self.manager.fuzzy_search_history.appendleft(self.cmd)
+
+    def _refresh(self):
+        lines, pos_list = self.searcher.filter()
+        self.middle.fuzzy_refresh(lines, pos_list)
+        self.manager._schedule_right()
+
+
+class GrepView(object):
+    """
+    hits of a content search streamed into the middle panel
+    """
+    def __init__(self, manager, pattern):
+        self.manager = manager
+        self.middle = manager.middle_panel
+        self.save_index = self.middle.index
+        ignorecase = vimeval('&ignorecase') == '1'
+        ignore = Ignore.for_root(self.middle.cwd, lfopt.ignore, lfopt.respect_ignore_files)
+        self.grep = Grep(self.middle.cwd, compile_grep(pattern, ignorecase), ignore,
+                         lfopt.grep_workers, lfopt.grep_max_size, lfopt.grep_max_hits)
+        self.middle.index = 0
+        self.middle.text = []
+        self.middle._render(0)
+        self.middle._match_clear()
+        self.grep.start()
+        self.timer = vimeval("timer_start({}, 'lf#grep_poll', #{{repeat: -1}})"
+                .format(lfopt.scan_interval))
+
+    def is_running(self):
+        return self.timer is not None
+
+    def progress(self):
+        return " grep {} files {} hits ".format(self.grep.files, self.grep.hits)
+
+    def poll(self):
+        """
+        move the hits found so far to the middle panel
+        """
+        is_done = not self.grep.is_alive()
+        hits = self.grep.take()
+        if hits:
+            self.middle.append_lines([GrepLine(entry, self.middle, *hit) for entry, *hit in hits])
+        if is_done:
+            self.stop()
+
+    def stop(self):
+        if self.timer is None:
+            return
+        vimcmd("call timer_stop({})".format(self.timer))
+        self.grep.cancel()
+        self.timer = None
+
+    def restore(self):
+        self.stop()
+        self.middle.refresh(index=self.save_index)
 
 
 class MsgRemovePanel(BaseShowPanel):
@@ -764,7 +1219,7 @@ class MsgRemovePanel(BaseShowPanel):
 
     def _settext_file(self):
         lines = sorted([SimpleLine(p) for p in self.path_list], key=attrgetter("sort_dir_first", "lower_text"))
-        self.dic_list.extend([line.opt for line in lines])
+        self.dic_list.extend([line.render() for line in lines])
 
     def agree(self):
         self.do = True
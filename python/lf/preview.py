@@ -0,0 +1,68 @@
+import logging
+
+
+logger = logging.getLogger()
+
+
+class HeadPreview(object):
+    """
+    first lines of a file read with a bounded read, binary files are shown
+    as hex dump
+    """
+    sniff_size = 8192
+    hex_width = 16
+
+    def __init__(self, path, size, max_bytes, max_lines):
+        self.path = path
+        self.size = size
+        self.max_lines = max_lines
+        self._read(max_bytes)
+        self.is_binary = b'\0' in self.data[:self.sniff_size]
+        if self.is_binary:
+            self._set_hex()
+        else:
+            self._set_text()
+
+    def _read(self, max_bytes):
+        try:
+            with open(self.path, 'rb') as f:
+                self.data = f.read(max_bytes)
+        except OSError as e:
+            logger.error(e)
+            self.data = b''
+        self.complete = len(self.data) >= self.size
+
+    def _set_text(self):
+        text = self.data.decode('utf-8', 'replace')
+        lines = text.split('\n')
+        if self.complete:
+            if lines[-1] == '':
+                lines.pop()
+        elif len(lines) > 1:
+            lines.pop()  # drop the partial last line
+        self.nr = len(lines)
+        self.lines = [line.rstrip('\r') for line in lines[:self.max_lines]]
+
+    def _set_hex(self):
+        self.nr = 0
+        width = self.hex_width
+        self.lines = ["binary file, {} bytes".format(self.size)]
+        data = self.data[:width * (self.max_lines - 1)]
+        for offset in range(0, len(data), width):
+            chunk = data[offset:offset + width]
+            words = [chunk[i:i + 2].hex() for i in range(0, len(chunk), 2)]
+            chars = ''.join(chr(c) if 32 <= c < 127 else '.' for c in chunk)
+            self.lines.append("{:08x}: {:<40} {}".format(offset, ' '.join(words), chars))
+
+    def linenr(self):
+        """
+        number of lines, estimated from the head if file is not read entirely
+        """
+        if self.is_binary:
+            return '-'
+        if self.complete:
+            return self.nr
+        nbytes = len(self.data)
+        if nbytes == 0 or self.nr == 0:
+            return '-'
+        return '~{}'.format(self.size * self.nr // nbytes)
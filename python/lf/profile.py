@@ -0,0 +1,162 @@
+import sys
+import time
+import json
+import logging
+from collections import Counter, defaultdict
+from . import utils
+
+
+logger = logging.getLogger()
+
+# upper bounds in ms of the latency buckets, the last bucket is unbounded
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class ActionStat(object):
+    """
+    vim calls and latency of one action
+    """
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0  # seconds spent in the action
+        self.calls = Counter()  # 'eval' or 'command' -> number of calls
+        self.call_time = 0.0  # seconds spent in vim calls
+        self.sites = Counter()  # 'file:line:function' -> number of calls
+        self.site_time = defaultdict(float)
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def add_latency(self, seconds):
+        self.count += 1
+        self.time += seconds
+        ms = seconds * 1000
+        for i, bound in enumerate(BUCKETS):
+            if ms < bound:
+                break
+        else:
+            i = len(BUCKETS)
+        self.histogram[i] += 1
+
+    def as_dict(self):
+        return {
+                'count': self.count,
+                'time': self.time,
+                'calls': dict(self.calls),
+                'call_time': self.call_time,
+                'sites': {site: [n, self.site_time[site]] for site, n in self.sites.most_common()},
+                'histogram': dict(zip([str(b) for b in BUCKETS] + ['inf'], self.histogram)),
+                }
+
+
+class Profiler(object):
+    """
+    count and time the vim calls made through utils.vimeval and
+    utils.vimcmd, per action dispatched by s:action or timer callback
+
+    calls made outside an action are not recorded, nor the calls during
+    which another action runs, such as the lf#action() that waits for the
+    next key inside an input loop
+    """
+    def __init__(self):
+        self.enabled = False
+        self.stats = defaultdict(ActionStat)
+        self._stack = []  # [name, start time, whether an action is nested]
+        self._begun = 0  # number of actions begun, to detect nesting
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._eval, self._command = utils._eval, utils._command
+        utils._eval = self._wrap(self._eval, 'eval')
+        utils._command = self._wrap(self._command, 'command')
+        logger.info("enable profiler")
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        utils._eval, utils._command = self._eval, self._command
+        self._stack = []
+        logger.info("disable profiler")
+
+    def reset(self):
+        self.stats.clear()
+
+    def _wrap(self, fun, kind):
+        def wrapper(cmd):
+            if not self._stack:
+                return fun(cmd)
+            begun = self._begun
+            start = time.perf_counter()
+            try:
+                return fun(cmd)
+            finally:
+                if begun == self._begun:
+                    self._record(kind, time.perf_counter() - start)
+        return wrapper
+
+    def _record(self, kind, seconds):
+        # frames: _record, wrapper, vimeval or vimcmd, caller
+        frame = sys._getframe(3)
+        code = frame.f_code
+        site = "{}:{}:{}".format(code.co_filename.rsplit('/', 1)[-1], frame.f_lineno, code.co_name)
+        stat = self.stats[self._stack[-1][0]]
+        stat.calls[kind] += 1
+        stat.call_time += seconds
+        stat.sites[site] += 1
+        stat.site_time[site] += seconds
+
+    def begin(self, name):
+        if not self.enabled:
+            return
+        self._begun += 1
+        if self._stack:
+            self._stack[-1][2] = True
+        self._stack.append([name, time.perf_counter(), False])
+
+    def end(self):
+        if not self.enabled or not self._stack:
+            return
+        name, start, nested = self._stack.pop()
+        stat = self.stats[name]
+        # the latency of an action that waits for input is meaningless
+        if not nested:
+            stat.add_latency(time.perf_counter() - start)
+
+    def report(self, top=5):
+        """
+        lines of the report, actions sorted by time spent in vim calls
+        """
+        lines = ["{:<28} {:>6} {:>9} {:>8} {:>8} {:>10}".format(
+            'action', 'count', 'avg ms', 'evals', 'cmds', 'vim ms')]
+        stats = sorted(self.stats.items(), key=lambda item: -item[1].call_time)
+        for name, stat in stats:
+            avg = stat.time / stat.count * 1000 if stat.count else 0
+            lines.append("{:<28} {:>6} {:>9.2f} {:>8} {:>8} {:>10.2f}".format(
+                name, stat.count, avg, stat.calls['eval'], stat.calls['command'],
+                stat.call_time * 1000))
+        for name, stat in stats:
+            lines.append('')
+            lines.append(name)
+            if stat.count:
+                buckets = ["<{}ms".format(b) for b in BUCKETS] + ['more']
+                lines.append('  latency: ' + ' '.join(
+                    "{}:{}".format(b, n) for b, n in zip(buckets, stat.histogram) if n))
+            for site, n in stat.sites.most_common(top):
+                lines.append("  {:>6} calls {:>9.2f} ms  {}".format(
+                    n, stat.site_time[site] * 1000, site))
+        return lines
+
+    def export(self, directory):
+        """
+        write the stats as json into directory, return the file path
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / time.strftime('profile-%Y%m%d-%H%M%S.json')
+        with open(path, 'w') as f:
+            json.dump({name: stat.as_dict() for name, stat in self.stats.items()}, f, indent=2)
+        logger.info("export profile to {}".format(path))
+        return path
+
+
+vlf_profiler = Profiler()
@@ -0,0 +1,220 @@
+import re
+import logging
+from functools import lru_cache
+
+
+logger = logging.getLogger()
+
+# very magic, magic, nomagic, very nomagic
+VERY_MAGIC, MAGIC, NOMAGIC, VERY_NOMAGIC = 3, 2, 1, 0
+
+_CLASSES = {
+        's': '[ \\t]', 'S': '[^ \\t]',
+        'd': '[0-9]', 'D': '[^0-9]',
+        'w': '[0-9A-Za-z_]', 'W': '[^0-9A-Za-z_]',
+        'a': '[A-Za-z]', 'A': '[^A-Za-z]',
+        'l': '[a-z]', 'L': '[^a-z]',
+        'u': '[A-Z]', 'U': '[^A-Z]',
+        'x': '[0-9A-Fa-f]', 'X': '[^0-9A-Fa-f]',
+        'o': '[0-7]', 'O': '[^0-7]',
+        'h': '[A-Za-z_]', 'H': '[^A-Za-z_]',
+        }
+
+_ESCAPES = {'t': '\\t', 'e': '\\x1b', 'r': '\\r', 'n': '\\n'}
+
+
+class Untranslatable(Exception):
+    """
+    vim regex atom that has no python equivalent here
+    """
+    pass
+
+
+class _Translator(object):
+    """
+    translate the commonly used subset of vim regex into python re
+    """
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.pos = 0
+        self.magic = MAGIC
+        self.ignorecase = None  # set by \c and \C
+        self.out = []
+
+    def _peek(self, offset=0):
+        pos = self.pos + offset
+        return self.pattern[pos] if pos < len(self.pattern) else ''
+
+    def _at_branch_start(self):
+        return self.out == [] or self.out[-1] in ('(', '(?:', '|')
+
+    def _at_branch_end(self):
+        rest = self.pattern[self.pos:]
+        if rest == '':
+            return True
+        if self.magic == VERY_MAGIC:
+            return rest[0] in '|)'
+        return rest[:2] in ('\\|', '\\)')
+
+    def translate(self):
+        while self.pos < len(self.pattern):
+            ch = self.pattern[self.pos]
+            self.pos += 1
+            if ch == '\\':
+                self._backslash()
+            else:
+                self._plain(ch)
+        return ''.join(self.out), self.ignorecase
+
+    def _special(self, ch, escaped):
+        """
+        whether ch is special in current magic level
+        """
+        if ch in '()|+?={@%<>':
+            return escaped != (self.magic == VERY_MAGIC)
+        if ch in '.*[~':
+            return escaped != (self.magic >= MAGIC)
+        return False
+
+    def _backslash(self):
+        ch = self._peek()
+        if ch == '':
+            raise Untranslatable('trailing backslash')
+        self.pos += 1
+        if ch in 'vmMV':
+            self.magic = {'v': VERY_MAGIC, 'm': MAGIC, 'M': NOMAGIC, 'V': VERY_NOMAGIC}[ch]
+        elif ch == 'c':
+            self.ignorecase = True
+        elif ch == 'C':
+            if self.ignorecase is None:
+                self.ignorecase = False
+        elif ch in _CLASSES:
+            self.out.append(_CLASSES[ch])
+        elif ch in _ESCAPES:
+            self.out.append(_ESCAPES[ch])
+        elif self._special(ch, True):
+            self._atom(ch)
+        elif ch in '^$' and self.magic == VERY_NOMAGIC:
+            self._anchor(ch)
+        elif ch.isalnum() or ch in '_&':
+            raise Untranslatable('\\' + ch)
+        else:
+            self.out.append(re.escape(ch))
+
+    def _plain(self, ch):
+        if ch in '^$' and self.magic != VERY_NOMAGIC:
+            self._anchor(ch)
+        elif self._special(ch, False):
+            self._atom(ch)
+        else:
+            self.out.append(re.escape(ch))
+
+    def _anchor(self, ch):
+        if ch == '^' and self._at_branch_start():
+            self.out.append('^')
+        elif ch == '$' and self._at_branch_end():
+            self.out.append('$')
+        else:
+            self.out.append(re.escape(ch))
+
+    def _atom(self, ch):
+        """
+        special character ch, backslash already consumed
+        """
+        if ch == '.':
+            self.out.append('.')
+        elif ch == '*':
+            self.out.append('*' if not self._at_branch_start() else '\\*')
+        elif ch in '+=?':
+            self.out.append('+' if ch == '+' else '?')
+        elif ch in '()|':
+            self.out.append(ch)
+        elif ch in '<>':
+            self.out.append('\\b')
+        elif ch == '{':
+            self._brace()
+        elif ch == '[':
+            self._bracket()
+        elif ch == '%' and self._peek() == '(':
+            self.pos += 1
+            self.out.append('(?:')
+        else:
+            raise Untranslatable(ch)
+
+    def _brace(self):
+        end = self.pattern.find('}', self.pos)
+        if end < 0:
+            raise Untranslatable('unclosed brace')
+        body = self.pattern[self.pos:end]
+        self.pos = end + 1
+        if body.endswith('\\'):
+            body = body[:-1]
+        lazy = body.startswith('-')
+        if lazy:
+            body = body[1:]
+        m = re.fullmatch(r'(\d*)(,?)(\d*)', body)
+        if m is None:
+            raise Untranslatable('brace {}'.format(body))
+        low, comma, high = m.groups()
+        if not comma:
+            rep = '*' if low == '' else '{%s}' % low
+        else:
+            rep = '{%s,%s}' % (low or '0', high)
+        self.out.append(rep + ('?' if lazy else ''))
+
+    def _bracket(self):
+        pattern = self.pattern
+        pos = self.pos
+        items = []
+        if pos < len(pattern) and pattern[pos] == '^':
+            items.append('^')
+            pos += 1
+        if pos < len(pattern) and pattern[pos] == ']':
+            items.append('\\]')
+            pos += 1
+        while pos < len(pattern) and pattern[pos] != ']':
+            ch = pattern[pos]
+            if ch == '[' and pattern[pos + 1:pos + 2] in (':', '=', '.'):
+                raise Untranslatable('character class')
+            if ch == '\\':
+                nxt = pattern[pos + 1:pos + 2]
+                if nxt in ('\\', ']', '^', '-'):
+                    items.append('\\' + nxt)
+                elif nxt in _ESCAPES:
+                    items.append(_ESCAPES[nxt])
+                else:
+                    items.append('\\\\')
+                    pos += 1
+                    continue
+                pos += 2
+                continue
+            items.append('\\[' if ch == '[' else ch)
+            pos += 1
+        if pos >= len(pattern):  # no closing ], '[' is literal
+            self.out.append('\\[')
+            return
+        self.pos = pos + 1
+        self.out.append('[' + ''.join(items) + ']')
+
+
+def translate(pattern):
+    """
+    python regex and case flag (None if not given) of vim regex pattern,
+    raise Untranslatable if pattern uses unsupported atoms
+    """
+    return _Translator(pattern).translate()
+
+
+@lru_cache(maxsize=32)
+def compile_pattern(pattern, ignorecase):
+    """
+    compiled python regex of vim pattern, None if it can not be translated
+    """
+    try:
+        py_pattern, case = translate(pattern)
+        if case is not None:
+            ignorecase = case
+        return re.compile(py_pattern, re.IGNORECASE if ignorecase else 0)
+    except (Untranslatable, re.error) as e:
+        logger.info('pattern "{}" is left to vim: {}'.format(pattern, e))
+        return None
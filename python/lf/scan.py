@@ -0,0 +1,196 @@
+import os
+import stat
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+
+
+logger = logging.getLogger()
+
+
+class Entry(object):
+    """
+    type, size and mtime of a directory entry, collected with a single stat,
+    path may be given as str and is made a Path when first used
+    """
+    __slots__ = ('_path', 'name', 'is_dir', 'is_file', 'is_link', 'size', 'mtime')
+
+    def __init__(self, path, name, is_dir, is_file, is_link, size, mtime):
+        self._path = path
+        self.name = name
+        self.is_dir = is_dir
+        self.is_file = is_file
+        self.is_link = is_link
+        self.size = size
+        self.mtime = mtime
+
+    @property
+    def path(self):
+        if isinstance(self._path, str):
+            self._path = Path(self._path)
+        return self._path
+
+    @property
+    def path_str(self):
+        return str(self._path)
+
+    @classmethod
+    def from_dirent(cls, de):
+        try:
+            is_link = de.is_symlink()
+            st = de.stat()
+            is_dir = de.is_dir()
+            is_file = de.is_file()
+        except OSError:  # broken symlink or removed entry
+            return cls(de.path, de.name, False, False, True, 0, 0)
+        return cls(de.path, de.name, is_dir, is_file, is_link, st.st_size, st.st_mtime)
+
+    @classmethod
+    def from_path(cls, path):
+        path = Path(path)
+        is_link = path.is_symlink()
+        try:
+            st = path.stat()
+        except OSError:
+            return cls(path, path.name, False, False, is_link, 0, 0)
+        is_dir = stat.S_ISDIR(st.st_mode)
+        is_file = stat.S_ISREG(st.st_mode)
+        return cls(path, path.name, is_dir, is_file, is_link, st.st_size, st.st_mtime)
+
+    def restat(self):
+        """
+        update size and mtime, which change without the mtime of the
+        directory, so that a cached entry may be outdated
+        """
+        try:
+            st = os.stat(self._path)
+        except OSError:
+            return
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+
+
+def scandir(cwd):
+    """
+    entries of directory cwd
+    """
+    try:
+        with os.scandir(cwd) as it:
+            return [Entry.from_dirent(de) for de in it]
+    except OSError as e:
+        logger.error(e)
+        return []
+
+
+def walk(cwd, max_depth=0, ignore=None):
+    """
+    entries of each directory under cwd, breadth first, symlinks to
+    directories are not followed, max_depth 0 means no limit, ignored
+    entries are dropped and ignored directories are not entered
+    """
+    queue = deque([(cwd, 1, ignore)])
+    while queue:
+        path, depth, ignore = queue.popleft()
+        entries = scandir(path)
+        if ignore is not None:
+            ignore = ignore.child(path, {e.name for e in entries})
+            entries = [e for e in entries if not ignore.ignored(e)]
+        yield entries
+        if max_depth and depth >= max_depth:
+            continue
+        queue.extend((e.path_str, depth + 1, ignore) for e in entries if e.is_dir and not e.is_link)
+
+
+class Scanner(threading.Thread):
+    """
+    walk cwd in a worker thread, the entries found are taken in batches by
+    the main thread with take(), with the paths of entries found outdated
+    """
+    def __init__(self, cwd, max_depth, max_entries, ignore=None, index=None):
+        super().__init__(daemon=True)
+        self.cwd = cwd
+        self.ignore = ignore
+        self.index = index
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.count = 0
+        self.truncated = False
+        self._pending = []
+        self._removed = []
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    def run(self):
+        logger.info("start scanning {}".format(self.cwd))
+        if self.index is not None:
+            batches = self._indexed()
+        else:
+            batches = walk(self.cwd, self.max_depth, self.ignore)
+        for entries in batches:
+            if self._cancel.is_set():
+                logger.info("scan of {} is cancelled".format(self.cwd))
+                return
+            if self.max_entries and self.count + len(entries) > self.max_entries:
+                entries = entries[:self.max_entries - self.count]
+                self.truncated = True
+            with self._lock:
+                self._pending.extend(entries)
+                self.count += len(entries)
+            if self.truncated:
+                logger.warning("stop scanning {} at {} entries".format(self.cwd, self.count))
+                return
+        logger.info("scanned {} entries under {}".format(self.count, self.cwd))
+
+    def _indexed(self, batch_size=5000):
+        """
+        entries of the stored index first, then the entries that changed
+        once the changed directories are scanned again, the paths of the
+        removed or changed entries are left for take()
+        """
+        index = self.index
+        with index.lock:
+            if not index.loaded:
+                index.load()
+            old = list(index.iter_entries(self.cwd))
+        for start in range(0, len(old), batch_size):
+            yield old[start:start + batch_size]
+        with index.lock:
+            if not index.refresh(self.ignore, self._cancel):
+                return
+            index.save()
+            new = list(index.iter_entries(self.cwd))
+        stats = {e.path_str: (e.is_dir, e.is_file, e.is_link, e.size, e.mtime) for e in old}
+        added, removed = [], []
+        for e in new:
+            path = e.path_str
+            stat = stats.pop(path, None)
+            if stat != (e.is_dir, e.is_file, e.is_link, e.size, e.mtime):
+                added.append(e)
+                if stat is not None:
+                    removed.append(path)
+        removed.extend(stats)
+        logger.info("index of {} is outdated by {} added and {} removed entries".format(
+            self.cwd, len(added), len(removed)))
+        if removed:
+            # entries not taken yet are dropped here, the others are removed
+            # by the main thread before it adds the entries taken with them
+            paths = set(removed)
+            with self._lock:
+                self._pending = [e for e in self._pending if e.path_str not in paths]
+                self._removed.extend(removed)
+                self.count -= len(removed)
+        for start in range(0, len(added), batch_size):
+            yield added[start:start + batch_size]
+
+    def take(self):
+        """
+        entries found and paths found outdated since last call
+        """
+        with self._lock:
+            entries, self._pending = self._pending, []
+            removed, self._removed = self._removed, []
+        return entries, removed
+
+    def cancel(self):
+        self._cancel.set()
@@ -1,37 +1,103 @@
 import logging, vim
-from .text import Text
-from .utils import vimeval, bytelen
+from functools import partial
+from .utils import vimeval
+from .width import bytelen
+from .regex import compile_pattern
+from .option import lfopt
 
 logger = logging.getLogger()
 
+# characters that may make a longer pattern match more lines
+_SPECIAL = set('\\[]~*$^')
+
+
+def can_narrow(prefix, pattern):
+    """
+    whether lines matching pattern are a subset of lines matching prefix
+    """
+    return pattern.startswith(prefix) and not _SPECIAL.intersection(pattern)
+
+
 class RegexSearch(object):
     def __init__(self, text, search_panel):
         self.text = text
         self.search_panel = search_panel
         self.middle_panel = search_panel.middle
+        # results of pattern prefixes: (pattern, lines, pos_list)
+        self._stack = [('', text, [])]
+        self.ignorecase = vimeval('&ignorecase') == '1'
 
     def _pattern(self):
         return self.search_panel.cmd
 
     def filter(self):
-        path_list = []
+        """
+        lines matching current pattern and positions of the matches, only
+        the lines matching the last shorter pattern are tested if possible
+        """
+        pattern = self._pattern()
+        stack = self._stack
+        while len(stack) > 1 and not pattern.startswith(stack[-1][0]):
+            stack.pop()
+        prefix, lines, pos_list = stack[-1]
+        if prefix == pattern:
+            return lines, pos_list
+        if not can_narrow(prefix, pattern):
+            lines = self.text
+        logger.info('try to match pattern "{}" on {} lines'.format(pattern, len(lines)))
+        line_list = []
         pos_list = []
-        logger.info('try to match pattern "{}"'.format(self._pattern()))
         try:
-            for line in self.middle_panel.text:
-                raw_text = line.raw_text
-                col, length, is_match = self._match(raw_text)
-                if is_match:
-                    path_list.append(line.path)
-                    pos_list.append((col, length))
+            self._match_lines(pattern, lines, line_list, pos_list)
         except vim.error as e:
             logger.warning(e)
-        self.middle_panel.path_list = path_list
-        return Text(self.middle_panel), pos_list
+            return line_list, pos_list
+        stack.append((pattern, line_list, pos_list))
+        return line_list, pos_list
+
+    def _match_lines(self, pattern, lines, line_list, pos_list):
+        match = self._matcher(pattern)
+        for line in lines:
+            col, length, is_match = match(line.raw_text)
+            if is_match:
+                line_list.append(line)
+                pos_list.append((col, length))
+
+    def extend(self, lines):
+        """
+        match lines appended to self.text against the cached patterns
+        """
+        prefix, new_lines = '', lines
+        for pattern, line_list, pos_list in self._stack[1:]:
+            base = new_lines if can_narrow(prefix, pattern) else lines
+            start = len(line_list)
+            try:
+                self._match_lines(pattern, base, line_list, pos_list)
+            except vim.error as e:
+                logger.warning(e)
+            prefix, new_lines = pattern, line_list[start:]
+
+    def _matcher(self, pattern):
+        """
+        python re is used if lfopt.search_backend is 'python' and pattern can
+        be translated, otherwise each line is matched by vim
+        """
+        if lfopt.search_backend == 'python':
+            regex = compile_pattern(pattern, self.ignorecase)
+            if regex is not None:
+                return partial(self._py_match, regex)
+        return partial(self._match, pattern)
+
+    def _py_match(self, regex, path):
+        m = regex.search(path)
+        if m is None:
+            return 0, 0, False
+        return bytelen(path[:m.start()]) + 1, bytelen(m.group(0)), True
 
-    def _match(self, path):
-        result = vimeval("matchstrpos('{}', '{}')".format(path, self._pattern()))
+    def _match(self, pattern, path):
+        path = path.replace("'", "''")
+        pattern = pattern.replace("'", "''")
+        result = vimeval("matchstrpos('{}', '{}')".format(path, pattern))
         string = result[0]
-        start = int(result[1])
-        before = path[:start]
-        return bytelen(before) + 1, bytelen(string), start != -1
+        start = int(result[1])  # byte index
+        return start + 1, bytelen(string), start != -1
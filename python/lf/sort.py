@@ -0,0 +1,58 @@
+import os
+import re
+from operator import attrgetter
+from .option import lfopt
+
+
+ORDERS = ('name', 'natural', 'size', 'mtime', 'ext')
+# orders by stat data, which a cached listing may have outdated
+STAT_ORDERS = ('size', 'mtime')
+_DIGITS = re.compile(r'(\d+)')
+
+# sort order and reverse of each directory whose order was changed
+_states = {}
+
+
+def natural_key(text):
+    """
+    text split into strings and numbers, so that file2 comes before file10
+    """
+    parts = _DIGITS.split(text)
+    parts[1::2] = map(int, parts[1::2])
+    return parts
+
+
+def get_state(cwd):
+    return _states.get(str(cwd), (lfopt.sort_order, lfopt.sort_reverse))
+
+
+def set_state(cwd, order, reverse):
+    _states[str(cwd)] = (order, reverse)
+
+
+def _key(order):
+    """
+    key of lines for order, ties are broken by name
+    """
+    name = attrgetter('lower_text' if lfopt.sort_ignorecase else 'raw_text')
+    if order == 'natural':
+        return lambda line: natural_key(name(line))
+    if order == 'size':
+        return lambda line: (line.entry.size, name(line))
+    if order == 'mtime':
+        return lambda line: (line.entry.mtime, name(line))
+    if order == 'ext':
+        return lambda line: (os.path.splitext(line.entry.name)[1].lower(), name(line))
+    return name
+
+
+def sort_lines(lines, state):
+    """
+    sort lines in place by state (order, reverse), directories stay first
+    if lfopt.sort_dir_first whatever the order
+    """
+    order, reverse = state
+    lines.sort(key=_key(order), reverse=reverse)
+    if lfopt.sort_dir_first:
+        # stable, so the order within directories and files is kept
+        lines.sort(key=attrgetter('sort_dir_first'))
@@ -1,20 +1,40 @@
+import os
 from operator import attrgetter
-from .utils import vimeval, dplen, bytelen
-from .option import lfopt
+from .width import dplen, bytelen
+from .scan import Entry
+from .sort import get_state, sort_lines
 
 
 class BaseLine(object):
-    def __init__(self, path):
-        self.path = path
-        self.text = ''
+    """
+    a line of a panel, the dict sent to vim is made by render only for the
+    rows shown
+    """
+    __slots__ = ('entry',)
+    lnum = None  # line to jump to when the file is opened
+
+    def __init__(self, entry):
+        self.entry = entry
+
+    @property
+    def path(self):
+        return self.entry.path
 
     @property
     def is_hidden(self):
-        return self.path.name.startswith('.')
+        return self.entry.name.startswith('.')
 
     @property
     def is_dir(self):
-        return self.path.is_dir()
+        return self.entry.is_dir
+
+    @property
+    def sort_dir_first(self):
+        return 0 if self.entry.is_dir else 1
+
+    @property
+    def lower_text(self):
+        return self.raw_text.lower()
 
     def _get_proptype(self):
         if self.is_dir:
@@ -24,88 +44,162 @@ class BaseLine(object):
         return prop_type
 
 
-class SimpleLine(BaseLine):
-    def __init__(self, path):
-        super().__init__(path)
-        self._set_text()
-        self._set_sort()
-        self._set_textline()
+def relative_start(cwd):
+    """
+    index where the path relative to cwd starts in the path of an entry
+    """
+    start = len(str(cwd))
+    if str(cwd)[-1] != '/':
+        start += 1
+    return start
+
 
-    def _set_text(self):
-        self.text = str(self.path.resolve())
+class SimpleLine(BaseLine):
+    __slots__ = ('raw_text',)
 
-    def _set_sort(self):
-        self.sort_dir_first = 0 if self.is_dir else 1
-        self.lower_text = self.text.lower()
+    def __init__(self, path):
+        super().__init__(Entry.from_path(path))
+        self.raw_text = str(self.path.resolve())
 
-    def _set_textline(self):
-        opt = {"text": self.text}
-        prop = {"col": 1, "length": bytelen(self.text)}
-        prop["type"] = self._get_proptype()
-        opt["props"] = [prop]
-        self.opt = opt
+    def render(self, winwidth=None):
+        prop = {"col": 1, "length": bytelen(self.raw_text), "type": self._get_proptype()}
+        return {"text": self.raw_text, "props": [prop]}
 
 
 class Line(BaseLine):
-    def __init__(self, path, panel):
-        self.path = path
-        self._cwd = panel.cwd
-        self._winwidth = panel.winwidth
-        self._show_hidden = panel.show_hidden
-        self._set_text()
-        self._set_textline()
-        self._set_sort()
-
-    def _set_sort(self):
-        self.sort_dir_first = 0 if self.is_dir else 1
-        self.lower_text = self.raw_text.lower()
-
-    def _set_text(self):
-        start = len(str(self._cwd))
-        if str(self._cwd)[-1] != '/':
-            start += 1
-        slash = '/' if self.path.is_dir() else ''
-        text = str(self.path)[start:] + slash
+    """
+    an entry listed by its path relative to the panel, the text is padded
+    with blanks to the window width only when rendered
+    """
+    __slots__ = ('raw_text', 'width', 'nbytes')
+
+    def __init__(self, entry, start):
+        self.entry = entry
+        slash = '/' if entry.is_dir else ''
+        text = entry.path_str[start:] + slash
         self.raw_text = text
-        rest = self._winwidth - dplen(text) % self._winwidth
-        blank = ' ' * rest
-        self.text = text + blank
-        self.bytelen = bytelen(self.text)
+        self.width = dplen(text)
+        self.nbytes = bytelen(text)
+
+    def render(self, winwidth):
+        rest = winwidth - self.width % winwidth
+        prop = {"col": 1, "length": self.nbytes + rest, "type": self._get_proptype()}
+        return {"text": self.raw_text + ' ' * rest, "props": [prop]}
+
+
+class GrepLine(BaseLine):
+    """
+    a matched line of file content shown as path:lnum:text
+    """
+    __slots__ = ('lnum', 'col', 'raw_text', 'width', 'name_bytes')
+
+    def __init__(self, entry, panel, lnum, col, content):
+        self.entry = entry
+        self.lnum = lnum
+        self.col = col
+        name = entry.path_str[relative_start(panel.cwd):]
+        self.raw_text = "{}:{}:{}".format(name, lnum, content)
+        self.width = dplen(self.raw_text)
+        self.name_bytes = bytelen(name)
 
-    def _set_textline(self):
-        opt = {"text": self.text}
-        prop = {"col": 1, "length": self.bytelen}
-        prop["type"] = self._get_proptype()
-        opt["props"] = [prop]
-        self.opt = opt
+    def render(self, winwidth):
+        rest = winwidth - self.width % winwidth
+        prop = {"col": 1, "length": self.name_bytes, "type": self._get_proptype()}
+        return {"text": self.raw_text + ' ' * rest, "props": [prop]}
+
+
+# value of an entry for each column lines are filtered by
+COLUMNS = {
+    'dir': attrgetter('is_dir'),
+    'file': attrgetter('is_file'),
+    'ext': lambda entry: os.path.splitext(entry.name)[1],
+}
+
+
+def path_rows(lines):
+    """
+    index of the first line of each path
+    """
+    paths = [line.entry.path_str for line in lines]
+    # the last pair of a key wins, so pairs are given from the end
+    return dict(zip(reversed(paths), range(len(paths) - 1, -1, -1)))
 
 
 class Text(object):
-    def __init__(self, panel):
+    def __init__(self, panel, entry_list=None, lines=None):
+        """
+        lines of entry_list, or the given lines if they are already made
+        from it, which are only sorted
+        """
         self.panel = panel
         self._text = []
-        for p in panel.path_list:
-            line = Line(p, panel)
-            if self._ignore(line):
-                continue
-            self._text.append(line)
-        key = []
-        if lfopt.sort_dir_first:
-            key.append('sort_dir_first')
-        if lfopt.sort_ignorecase:
-            key.append('lower_text')
-        if key == []:
-            self._text = sorted(self._text)
+        self._rows = None
+        self._columns = {}
+        self.state = get_state(panel.cwd)
+        if entry_list is None:
+            entry_list = panel.entry_list
+        # entries of the hidden lines too, which the listing is compared to
+        self.entry_list = entry_list
+        if lines is not None:
+            self._text = lines
         else:
-            self._text = sorted(self._text, key=attrgetter(*key))
+            start = relative_start(panel.cwd)
+            for entry in entry_list:
+                line = Line(entry, start)
+                if self._ignore(line):
+                    continue
+                self._text.append(line)
+        sort_lines(self._text, self.state)
 
     @property
     def text(self):
         return self._text
 
-    @property
-    def props(self):
-        return [line.opt for line in self._text]
+    def sort(self, state):
+        """
+        sort the lines in place if state differs from their order
+        """
+        if state != self.state:
+            sort_lines(self._text, state)
+            self.state = state
+            self._rows = None
+            self._columns = {}
+
+    def restat(self):
+        """
+        stat the entries again, the lines are sorted again by sort
+        """
+        for entry in self.entry_list:
+            entry.restat()
+        self.state = None
+
+    def rows(self):
+        """
+        index of each path, built once per order of the lines
+        """
+        if self._rows is None:
+            self._rows = path_rows(self._text)
+        return self._rows
+
+    def column(self, name):
+        """
+        value of column name for each line, built once per order of the lines
+        """
+        if name not in self._columns:
+            value = COLUMNS[name]
+            self._columns[name] = [value(line.entry) for line in self._text]
+        return self._columns[name]
+
+    def select(self, filters):
+        """
+        indices of the lines whose column equals the value of each filter,
+        filters are (column name, value) pairs
+        """
+        view = range(len(self._text))
+        for name, value in filters:
+            column = self.column(name)
+            view = [i for i in view if column[i] == value]
+        return view
 
     def _ignore(self, line: Line):
         if not self.panel.show_hidden:
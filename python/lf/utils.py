@@ -2,9 +2,14 @@ import vim
 
 from functools import partial
 from pathlib import Path
-from copy import copy
 
-vimcmd = vim.command
+# all vim calls go through these, the profiler replaces them
+_eval = vim.eval
+_command = vim.command
+
+
+def vimcmd(cmd):
+    _command(cmd)
 
 
 def vimeval(cmd, to_int=0):
@@ -14,7 +19,7 @@ def vimeval(cmd, to_int=0):
         1 for int
         2 for float
     """
-    r = vim.eval(cmd)
+    r = _eval(cmd)
     if to_int == 0:
         return r
     if to_int == 1:
@@ -41,27 +46,16 @@ def winexec(winid, cmd):
     vimcmd('call win_execute({}, "{}")'.format(winid, cmd))
 
 
-def dplen(text):
-    text = copy(text).replace("\\", "\\\\")
-    return vimeval('strdisplaywidth("{}")'.format(text), 1)
-
-
-def bytelen(text):
-    text = copy(text).replace("\\", "\\\\")
-    return vimeval('len("{}")'.format(text), 1)
-
 def vimstr(l):
     if isinstance(l, str):
         return l
     return str(l).replace('\\\\', '\\')
 
 
-def get_cwd():
-    cwd = vimeval("fnamemodify(resolve(expand('%:p')), ':p:h')")
-    use_root = vimget("use_root", 1) == '1'
-    if not use_root:
-        return cwd
-    is_root = False
+def find_root(cwd):
+    """
+    nearest ancestor of cwd that has a root marker, None if not found
+    """
     root_marker = vimget("root_marker", ['.root', '.git', '.svn', '.hg', '.project'])
     level = vimget("root_search_level", 5, 1)
     cur = Path(cwd)
@@ -72,12 +66,29 @@ def get_cwd():
         for marker in root_marker:
             f = cur / marker
             if not f.is_symlink() and f.exists():
-                is_root = True
-                break
-        if is_root:
-            break
+                return cur if cur != Path.home() else None
         n += 1
-    return str(cur) if is_root and cur != Path.home() else cwd
+    return None
+
+
+def get_cwd():
+    cwd = vimeval("fnamemodify(resolve(expand('%:p')), ':p:h')")
+    use_root = vimget("use_root", 1) == '1'
+    if not use_root:
+        return cwd
+    root = find_root(cwd)
+    return cwd if root is None else str(root)
+
+
+def human_size(sz):
+    """
+    size in bytes with the largest unit not above it
+    """
+    for unit in ('B', 'KB', 'MB'):
+        if sz < 2 ** 10:
+            return "{} {}".format(sz, unit)
+        sz >>= 10
+    return "{} GB".format(sz)
 
 
 def vimsg(type, msg):
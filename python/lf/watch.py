@@ -0,0 +1,151 @@
+import os
+import sys
+import struct
+import ctypes
+import ctypes.util
+import logging
+
+
+logger = logging.getLogger()
+
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+         | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT = struct.Struct('iIII')
+
+
+class PollingWatcher(object):
+    """
+    detect changes of directories by their mtime
+    """
+    def __init__(self):
+        self._mtimes = {}
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def watch(self, paths):
+        """
+        watch exactly the directories in paths
+        """
+        mtimes = {}
+        for path in paths:
+            mtimes[path] = self._mtimes[path] if path in self._mtimes else self._mtime(path)
+        self._mtimes = mtimes
+
+    def poll(self):
+        """
+        changed directories mapped to the changed names, None if unknown
+        """
+        changes = {}
+        for path, mtime in self._mtimes.items():
+            new = self._mtime(path)
+            if new != mtime:
+                self._mtimes[path] = new
+                changes[path] = None
+        return changes
+
+    def close(self):
+        self._mtimes = {}
+
+
+class InotifyWatcher(object):
+    """
+    detect changes of directories by inotify, the events of a directory are
+    reduced to the set of names that changed
+    """
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._wd = {}  # path -> watch descriptor
+        self._path = {}  # watch descriptor -> path
+
+    def watch(self, paths):
+        """
+        watch exactly the directories in paths
+        """
+        for path in set(self._wd) - set(paths):
+            self._rm_watch(self.fd, self._wd.pop(path))
+        for path in set(paths) - set(self._wd):
+            wd = self._add_watch(self.fd, os.fsencode(path), _MASK)
+            if wd < 0:
+                logger.info("can not watch {}: errno {}".format(path, ctypes.get_errno()))
+                continue
+            self._wd[path] = wd
+            self._path[wd] = path
+
+    def poll(self):
+        """
+        changed directories mapped to the changed names, None if unknown
+        """
+        changes = {}
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                logger.error(e)
+                break
+            self._parse(data, changes)
+        return changes
+
+    def _parse(self, data, changes):
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                for path in self._wd:
+                    changes[path] = None
+                continue
+            path = self._path.get(wd)
+            if path is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._path[wd]
+                if self._wd.get(path) == wd:
+                    del self._wd[path]  # watched again on next watch()
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF) or not name:
+                changes[path] = None
+            elif changes.get(path, ()) is not None:
+                changes.setdefault(path, set()).add(name)
+
+    def close(self):
+        os.close(self.fd)
+        self._wd = {}
+        self._path = {}
+
+
+def create_watcher():
+    """
+    inotify watcher on linux, mtime polling elsewhere or if inotify fails
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            logger.warning("inotify is not available: {}".format(e))
+    return PollingWatcher()
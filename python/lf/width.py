@@ -0,0 +1,123 @@
+from bisect import bisect_right
+from functools import lru_cache
+from unicodedata import east_asian_width, category
+
+
+# characters that vim shows as <xxxx>
+_NONPRINT = (
+        (0x070f, 0x070f), (0x180b, 0x180e), (0x200b, 0x200f), (0x202a, 0x202e),
+        (0x2060, 0x206f), (0xd800, 0xdfff), (0xfeff, 0xfeff), (0xfff9, 0xfffb),
+        (0xfffe, 0xffff),
+        )
+
+# characters that are double width only because of 'emoji'
+_EMOJI = (
+        (0x23ed, 0x23ef), (0x23f1, 0x23f2), (0x23f8, 0x23fa), (0x24c2, 0x24c2),
+        (0x261d, 0x261d), (0x26c8, 0x26c8), (0x26cf, 0x26cf), (0x26d1, 0x26d1),
+        (0x26d3, 0x26d3), (0x26e9, 0x26e9), (0x26f0, 0x26f1), (0x26f7, 0x26f9),
+        (0x270c, 0x270d), (0x2934, 0x2935), (0x1f170, 0x1f189),
+        (0x1f1e6, 0x1f1ff), (0x1f321, 0x1f321), (0x1f324, 0x1f32c), (0x1f336, 0x1f336),
+        (0x1f37d, 0x1f37d), (0x1f396, 0x1f397), (0x1f399, 0x1f39b), (0x1f39e, 0x1f39f),
+        (0x1f3cb, 0x1f3ce), (0x1f3d4, 0x1f3df), (0x1f3f3, 0x1f3f5), (0x1f3f7, 0x1f3f7),
+        (0x1f43f, 0x1f43f), (0x1f441, 0x1f441), (0x1f4fd, 0x1f4fd), (0x1f549, 0x1f54a),
+        (0x1f56f, 0x1f570), (0x1f573, 0x1f579), (0x1f587, 0x1f587), (0x1f58a, 0x1f58d),
+        (0x1f590, 0x1f590), (0x1f5a5, 0x1f5a5), (0x1f5a8, 0x1f5a8), (0x1f5b1, 0x1f5b2),
+        (0x1f5bc, 0x1f5bc), (0x1f5c2, 0x1f5c4), (0x1f5d1, 0x1f5d3), (0x1f5dc, 0x1f5de),
+        (0x1f5e1, 0x1f5e1), (0x1f5e3, 0x1f5e3), (0x1f5e8, 0x1f5e8), (0x1f5ef, 0x1f5ef),
+        (0x1f5f3, 0x1f5f3), (0x1f5fa, 0x1f5fa), (0x1f6cb, 0x1f6cf), (0x1f6e0, 0x1f6e5),
+        (0x1f6e9, 0x1f6e9), (0x1f6f0, 0x1f6f0), (0x1f6f3, 0x1f6f3),
+        )
+
+# 'ambiwidth', 'tabstop' and 'emoji' of vim, set by set_options
+_ambi_width = 1
+_tabstop = 8
+_emoji = True
+
+
+def _in_table(cp, table, starts):
+    i = bisect_right(starts, cp) - 1
+    return i >= 0 and cp <= table[i][1]
+
+
+_NONPRINT_START = [a for a, _ in _NONPRINT]
+_EMOJI_START = [a for a, _ in _EMOJI]
+
+
+def set_options(ambiwidth, tabstop, emoji):
+    """
+    set the options of vim that widths depend on, cached widths are dropped
+    if they change
+    """
+    global _ambi_width, _tabstop, _emoji
+    options = (2 if ambiwidth == 'double' else 1, int(tabstop), bool(int(emoji)))
+    if options == (_ambi_width, _tabstop, _emoji):
+        return
+    _ambi_width, _tabstop, _emoji = options
+    _char_width.cache_clear()
+    dplen.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def _char_width(ch):
+    """
+    width of a single non-ascii character, negative for composing characters
+    which only take up space at the start of text
+    """
+    cp = ord(ch)
+    if cp < 0xa0:
+        return 4  # <80> .. <9f>
+    cat = category(ch)
+    sign = -1 if cat in ('Mn', 'Me') else 1
+    if _in_table(cp, _NONPRINT, _NONPRINT_START):
+        return sign * len("<{:04x}>".format(cp))
+    eaw = east_asian_width(ch)
+    if cat == 'Cn':  # unassigned code points are wide only in CJK planes
+        return 2 if 0x20000 <= cp <= 0x3fffd and (cp & 0xfffe) != 0xfffe else 1
+    if eaw in ('W', 'F'):
+        return sign * 2
+    if sign < 0:
+        return -_ambi_width if eaw == 'A' else -1
+    if _emoji and _in_table(cp, _EMOJI, _EMOJI_START):
+        return 2
+    if eaw == 'A':
+        return _ambi_width
+    return 1
+
+
+@lru_cache(maxsize=65536)
+def dplen(text):
+    """
+    same as strdisplaywidth() of vim
+    """
+    if text.isascii() and text.isprintable():
+        return len(text)
+    width = 0
+    for ch in text:
+        if ch < '\x7f':
+            if ch >= ' ':
+                width += 1
+            elif ch == '\t':
+                width += _tabstop - width % _tabstop
+            else:
+                width += 2  # ^@ .. ^_
+        elif ch == '\x7f':
+            width += 2  # ^?
+        else:
+            w = _char_width(ch)
+            if w < 0:  # composing character is drawn over the previous one
+                w = 0 if width > 0 else -w
+            width += w
+    return width
+
+
+@lru_cache(maxsize=65536)
+def bytelen(text):
+    """
+    same as len() of vim, i.e. number of bytes of utf-8 encoded text
+    """
+    if text.isascii():
+        return len(text)
+    try:
+        return len(text.encode('utf-8', 'surrogateescape'))
+    except UnicodeEncodeError:
+        return len(text.encode('utf-8', 'surrogatepass'))
@@ -0,0 +1,88 @@
+"""
+parity of lf.width with strdisplaywidth() and len() of vim, the expected
+widths are those of vim 9.0
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'python'))
+
+from lf.width import dplen, bytelen, set_options
+
+
+# (&ambiwidth, &tabstop, &emoji) of each column of widths
+OPTIONS = [('single', 8, 1), ('double', 8, 1), ('single', 4, 1), ('single', 8, 0), ('double', 8, 0)]
+
+WIDTHS = [
+    # ascii
+    ('abc.txt', 7, 7, 7, 7, 7),
+    ('', 0, 0, 0, 0, 0),
+    ('a b', 3, 3, 3, 3, 3),
+    # tabs
+    ('\tx', 9, 9, 5, 9, 9),
+    ('ab\tc', 9, 9, 5, 9, 9),
+    ('a\t\tb', 17, 17, 9, 17, 17),
+    ('12345678\tx', 17, 17, 13, 17, 17),
+    # control characters, shown as ^A, ^? and <80>
+    ('a\x01b', 4, 4, 4, 4, 4),
+    ('\x1b', 2, 2, 2, 2, 2),
+    ('a\x7f', 3, 3, 3, 3, 3),
+    ('\x80\x9f', 8, 8, 8, 8, 8),
+    # east asian width
+    ('\u65e5\u672c\u8a9e', 6, 6, 6, 6, 6),
+    ('\uff21\uff22', 4, 4, 4, 4, 4),
+    ('\ud55c\uae00', 4, 4, 4, 4, 4),
+    # composing characters
+    ('e\u0301', 1, 1, 1, 1, 1),
+    ('\u0301a', 2, 3, 2, 2, 3),
+    ('\u3099', 2, 2, 2, 2, 2),
+    # ambiguous width
+    ('caf\xe9', 4, 5, 4, 4, 5),
+    ('\xb1\xd7\xf7', 3, 6, 3, 3, 6),
+    ('\u03b1\u03b2', 2, 4, 2, 2, 4),
+    ('\u2500\u2502', 2, 4, 2, 2, 4),
+    # emoji, double width by east asian width or only by &emoji
+    ('\U0001f600', 2, 2, 2, 2, 2),
+    ('\u2934', 2, 2, 2, 1, 1),
+    ('\u261d', 2, 2, 2, 1, 1),
+    ('\U0001f1e6', 2, 2, 2, 1, 1),
+    # non-printable characters, shown as <200b>
+    ('a\u200bb', 8, 8, 8, 8, 8),
+    ('\ufeff', 6, 6, 6, 6, 6),
+    ('\u200f', 6, 6, 6, 6, 6),
+    ('\uffff', 6, 6, 6, 6, 6),
+    ('a\u65e5\tb\u0301\xb1\U0001f600', 12, 13, 8, 12, 13),
+]
+
+
+@pytest.fixture(autouse=True)
+def default_options():
+    yield
+    set_options('single', 8, 1)
+
+
+@pytest.mark.parametrize('column', range(len(OPTIONS)), ids=['-'.join(map(str, o)) for o in OPTIONS])
+@pytest.mark.parametrize('row', WIDTHS, ids=[ascii(row[0]) for row in WIDTHS])
+def test_dplen(row, column):
+    set_options(*OPTIONS[column])
+    assert dplen(row[0]) == row[column + 1]
+
+
+def test_dplen_follows_options():
+    assert dplen('\t\xb1') == 9
+    set_options('double', 4, 1)
+    assert dplen('\t\xb1') == 6
+
+
+@pytest.mark.parametrize('text, length', [
+    ('abc', 3),
+    ('caf\xe9', 5),
+    ('\u65e5\u672c', 6),
+    ('e\u0301', 3),
+    ('\U0001f600', 4),
+    ('\udcff', 1),  # undecodable byte of a file name
+])
+def test_bytelen(text, length):
+    assert bytelen(text) == length